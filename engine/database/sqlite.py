@@ -1182,6 +1182,62 @@ class SQLiteAdapter(DatabaseAdapter):
             self.connection.rollback()
             return False
 
+    def add_memory_facts(self, user_id: Optional[str], texts: List[str], private: bool = True) -> int:
+        """
+        Add several memory facts in one transaction.
+
+        The texts are embedded with a single call; each fact still gets its own
+        vector store file so it can be forgotten on its own.
+
+        Args:
+            user_id: User ID (None for shared memory)
+            texts: Memory fact texts
+            private: Whether the memories are private to the user
+
+        Returns:
+            int: Number of memory facts added (0 on failure)
+        """
+        if not texts:
+            return 0
+
+        try:
+            if not self.connection:
+                self.connect()
+
+            now = datetime.now().isoformat()
+
+            # Create embedding directory
+            embedding_dir = Path(self.db_path).parent / "vectorstore"
+            embedding_dir.mkdir(exist_ok=True)
+            embedding_dir = embedding_dir / (user_id if user_id else "shared")
+            embedding_dir.mkdir(exist_ok=True)
+
+            vectors = self.embeddings.embed_documents(texts)
+
+            cursor = self.connection.cursor()
+            for text, vector in zip(texts, vectors):
+                fact_id = str(uuid.uuid4())
+                embedding_file = str(embedding_dir / f"{fact_id}.faiss")
+                cursor.execute(
+                    """
+                    INSERT INTO memory_facts (id, user_id, text, private, created_at, embedding_file)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (fact_id, user_id, text, 1 if private else 0, now, embedding_file)
+                )
+
+                vector_store = FAISS.from_embeddings(
+                    [(text, vector)], self.embeddings, metadatas=[{"id": fact_id}]
+                )
+                vector_store.save_local(embedding_file)
+
+            self.connection.commit()
+            return len(texts)
+        except Exception as e:
+            self.logger.error(f"Error adding memory facts: {e}")
+            self.connection.rollback()
+            return 0
+
     def search_memory(self, query: str, user_id: Optional[str] = None, include_shared: bool = True, k: int = 3) -> List[Dict[str, Any]]:
         """
         Search memory.
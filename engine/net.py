@@ -1,6 +1,8 @@
 import requests
 import random
+import re
 import time
+from urllib.parse import quote_plus
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
@@ -8,13 +10,22 @@ USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_2_1) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.4 Safari/605.1.15",
 ]
 
-def get(url: str, retries: int = 2, timeout: int = 10, headers: dict = None) -> requests.Response:
+# Queries made only of ASCII letters, digits and spaces need no percent-encoding
+_SAFE_QUERY = re.compile(r'\A[A-Za-z0-9 ]+\Z')
+
+def quote_query(query: str) -> str:
+    """quote_plus() with a shortcut for plain alphanumeric queries."""
+    if _SAFE_QUERY.match(query):
+        return query.replace(" ", "+")
+    return quote_plus(query)
+
+def get(url: str, retries: int = 2, timeout: int = 10, headers: dict = None, stream: bool = False) -> requests.Response:
     last_error = None
     for attempt in range(retries):
         try:
             all_headers = headers or {}
             all_headers["User-Agent"] = random.choice(USER_AGENTS)
-            response = requests.get(url, headers=all_headers, timeout=timeout)
+            response = requests.get(url, headers=all_headers, timeout=timeout, stream=stream)
             response.raise_for_status()
             return response
         except Exception as e:
@@ -11,6 +11,11 @@ from typing import Dict, Any, Optional, List
 from engine.di import container
 from engine.interfaces import LLMBackendInterface
 
+# Filesystem hooks used by the detectors; tests swap these out instead of
+# patching pathlib.Path or builtins.open.
+_exists = Path.exists
+_open = open
+
 
 def detect_javascript_project(project_path: Path) -> Optional[Dict[str, Any]]:
     """
@@ -23,11 +28,11 @@ def detect_javascript_project(project_path: Path) -> Optional[Dict[str, Any]]:
         Dictionary containing project metadata or None if not a JavaScript project
     """
     package_json_path = project_path / "package.json"
-    if not package_json_path.exists():
+    if not _exists(package_json_path):
         return None
 
     try:
-        with open(package_json_path, "r", encoding="utf-8") as f:
+        with _open(package_json_path, "r", encoding="utf-8") as f:
             package_data = json.load(f)
 
         metadata = {
@@ -57,14 +62,14 @@ def detect_typescript_project(project_path: Path) -> Optional[Dict[str, Any]]:
         Dictionary containing project metadata or None if not a TypeScript project
     """
     tsconfig_path = project_path / "tsconfig.json"
-    if not tsconfig_path.exists():
+    if not _exists(tsconfig_path):
         return None
 
     # First get basic metadata from package.json if it exists
     js_metadata = detect_javascript_project(project_path)
 
     try:
-        with open(tsconfig_path, "r", encoding="utf-8") as f:
+        with _open(tsconfig_path, "r", encoding="utf-8") as f:
             tsconfig_data = json.load(f)
 
         metadata = js_metadata or {}
@@ -97,24 +102,24 @@ def detect_python_project(project_path: Path) -> Optional[Dict[str, Any]]:
     setup_py_path = project_path / "setup.py"
 
     # Check if any Python project files exist
-    if not any(p.exists() for p in [pyproject_path, requirements_path, setup_py_path]):
+    if not any(_exists(p) for p in [pyproject_path, requirements_path, setup_py_path]):
         return None
 
     metadata = {
         "project_type": "python",
-        "has_pyproject_toml": pyproject_path.exists(),
-        "has_requirements_txt": requirements_path.exists(),
-        "has_setup_py": setup_py_path.exists(),
+        "has_pyproject_toml": _exists(pyproject_path),
+        "has_requirements_txt": _exists(requirements_path),
+        "has_setup_py": _exists(setup_py_path),
         "path": str(project_path),
         "name": project_path.name,
     }
 
     # Extract metadata from pyproject.toml if it exists
-    if pyproject_path.exists():
+    if _exists(pyproject_path):
         try:
             # We don't use toml.load here to avoid adding a dependency
             # Instead, we'll parse it manually for basic metadata
-            with open(pyproject_path, "r", encoding="utf-8") as f:
+            with _open(pyproject_path, "r", encoding="utf-8") as f:
                 content = f.read()
 
             # Extract project name
@@ -144,9 +149,9 @@ def detect_python_project(project_path: Path) -> Optional[Dict[str, Any]]:
             print(f"Error parsing pyproject.toml: {e}")
 
     # Extract dependencies from requirements.txt if it exists
-    if requirements_path.exists():
+    if _exists(requirements_path):
         try:
-            with open(requirements_path, "r", encoding="utf-8") as f:
+            with _open(requirements_path, "r", encoding="utf-8") as f:
                 requirements = [line.strip() for line in f if line.strip() and not line.startswith('#')]
             metadata["dependencies"] = requirements
         except Exception as e:
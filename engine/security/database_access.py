@@ -189,6 +189,9 @@ def apply_database_access_controls(db_adapter: Any) -> None:
     if hasattr(db_adapter, 'add_memory_fact'):
         db_adapter.add_memory_fact = db_permission_required(Permission.CREATE_MEMORY)(db_adapter.add_memory_fact)
 
+    if hasattr(db_adapter, 'add_memory_facts'):
+        db_adapter.add_memory_facts = db_permission_required(Permission.CREATE_MEMORY)(db_adapter.add_memory_facts)
+
     if hasattr(db_adapter, 'search_memory'):
         original_search_memory = db_adapter.search_memory
 
@@ -19,6 +19,8 @@ def load_tools():
             "pattern": getattr(module, "pattern", ""),
             "action": getattr(module, "action", None),
         }
+        # Compile once here so dispatch doesn't go through re's cache per input
+        tool["compiled_pattern"] = getattr(module, "compiled_pattern", None) or re.compile(tool["pattern"], re.IGNORECASE)
         if callable(tool["action"]):
             _tools.append(tool)
 
@@ -26,7 +28,11 @@ def load_tools():
 
 def match_and_run_tools(user_input: str, tool_list: list) -> str | None:
     for tool in tool_list:
-        match = re.search(tool["pattern"], user_input, re.IGNORECASE)
+        compiled = tool.get("compiled_pattern")
+        if compiled is not None:
+            match = compiled.search(user_input)
+        else:
+            match = re.search(tool["pattern"], user_input, re.IGNORECASE)
         if match:
             return tool["action"](user_input, **match.groupdict())
     return None
@@ -98,6 +98,8 @@ class UserManager:
 
         # Active sessions (token -> user_id)
         self._sessions = {}
+        # Tokens per user (user_id -> {token}) so a user's sessions drop without a scan
+        self._user_tokens = {}
 
     def create_user(self, username: str, password: str, name: str = None, role: str = "user") -> Tuple[bool, str]:
         """
@@ -211,6 +213,7 @@ class UserManager:
                     "user_id": username,
                     "expires": expiry.isoformat()
                 }
+                self._user_tokens.setdefault(username, set()).add(token)
 
                 # Update last login
                 self._update_last_login(username)
@@ -241,7 +244,7 @@ class UserManager:
 
         if datetime.now() > expiry:
             # Session expired
-            del self._sessions[token]
+            self._drop_session(token)
             return None
 
         return session["user_id"]
@@ -257,10 +260,19 @@ class UserManager:
             True if token was invalidated, False otherwise
         """
         if token in self._sessions:
-            del self._sessions[token]
+            self._drop_session(token)
             return True
         return False
 
+    def _drop_session(self, token: str) -> None:
+        """Remove a session token and its entry in the per-user token index."""
+        session = self._sessions.pop(token)
+        tokens = self._user_tokens.get(session["user_id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._user_tokens[session["user_id"]]
+
     def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a user's profile data.
@@ -360,9 +372,8 @@ class UserManager:
 
 
             # Remove any active sessions for this user
-            for token, session in list(self._sessions.items()):
-                if session["user_id"] == user_id:
-                    del self._sessions[token]
+            for token in self._user_tokens.pop(user_id, ()):
+                self._sessions.pop(token, None)
 
             return True
         except Exception as e:
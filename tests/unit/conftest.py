@@ -10,6 +10,18 @@ def patch_subprocess_run(monkeypatch):
     monkeypatch.setattr(subprocess, "run", lambda *a, **k: None)
 
 
+class _Stub(types.ModuleType):
+    """Cheap import shim: any attribute or call hands back the stub itself."""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
 # Provide a tiny fake sounddevice so imports succeed.
 fake_sd = SimpleNamespace(
     play=lambda *a, **k: None,
@@ -22,10 +34,17 @@ fake_sd = SimpleNamespace(
 sys.modules.setdefault("sounddevice", fake_sd)
 sys.modules.setdefault("TTS", MagicMock())
 sys.modules.setdefault("TTS.api", MagicMock())
-sys.modules.setdefault('langchain_community',MagicMock())
-sys.modules.setdefault('langchain_community.vectorstores',MagicMock())
+# Heavyweight ML imports only need to resolve; tests patch what they use
+for name in (
+    'langchain_community',
+    'langchain_community.vectorstores',
+    'langchain_community.vectorstores.FAISS',
+    'sentence_transformers',
+    'sentence_transformers.SentenceTransformer',
+    'faiss',
+):
+    sys.modules.setdefault(name, _Stub(name))
 sys.modules.setdefault('langchain_community.embeddings',types.ModuleType("langchain_community.embeddings"))
-sys.modules.setdefault('langchain_community.vectorstores.FAISS',MagicMock())
 
 fake_torch = SimpleNamespace(
         cuda=SimpleNamespace(is_available=lambda: False),
@@ -35,12 +54,9 @@ fake_torch = SimpleNamespace(
     )
 sys.modules.setdefault("torch", fake_torch)
 
-sys.modules.setdefault('sentence_transformers', MagicMock())
-sys.modules.setdefault('sentence_transformers.SentenceTransformer', MagicMock())
 huggingface_mod = types.ModuleType("langchain_huggingface")
-huggingface_mod.HuggingFaceEmbeddings = MagicMock()
+huggingface_mod.HuggingFaceEmbeddings = _Stub("HuggingFaceEmbeddings")
 sys.modules.setdefault('langchain_huggingface', huggingface_mod)
-sys.modules.setdefault('faiss', MagicMock())
 
 # Mock voice module dependencies
 sys.modules.setdefault('sounddevice', MagicMock())
@@ -0,0 +1,29 @@
+"""In-memory stand-in for the vectorstore files the database adapters write.
+
+The FAISS stubs in the adapter tests "save" an index by adding its path to
+FAKE_FS; patching an adapter module's Path with FakeFSPath makes its
+existence checks and deletes consult that set instead of the disk.
+"""
+import os
+from pathlib import Path
+
+# Paths of the vectorstore indexes the stubs have "saved"
+FAKE_FS: set[str] = set()
+
+
+class FakeFSPath(type(Path())):
+    """Path whose existence checks and deletes consult FAKE_FS instead of disk."""
+    def exists(self, *, follow_symlinks=True):
+        return str(self) in FAKE_FS
+
+    def unlink(self, missing_ok=False):
+        FAKE_FS.discard(str(self))
+
+    def mkdir(self, mode=0o777, parents=False, exist_ok=False):
+        pass
+
+
+def fake_glob(directory: Path):
+    # The saved *.faiss indexes directly under directory
+    directory = str(directory)
+    return [p for p in FAKE_FS if p.endswith(".faiss") and os.path.dirname(p) == directory]
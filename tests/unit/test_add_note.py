@@ -1,11 +1,12 @@
-from pathlib import Path
 import pytest
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 
+import tools.add_note as add_note
 from tools.add_note import action
 
-def test_action_returns_correct_message():
+def test_action_returns_correct_message(tmp_path, monkeypatch):
     # Test that the function returns the expected message
+    monkeypatch.setattr(add_note, "_NOTES_DIR", tmp_path / "notes")
     result = action("remind me to", "buy milk")
     # Use repr to see the actual string with escape sequences
     print(f"Expected: {repr('Got it. I noted: "buy milk".')}")
@@ -27,24 +28,28 @@ def mock_datetime_now():
         mock_dt.now.return_value.date.return_value = "2025-05-28"
         yield mock_dt
 
-def test_action_writes_to_file(mock_datetime_now):
-    # Test that the function writes the expected content to the file
-    mock_file = mock_open()
+def test_action_writes_to_file(mock_datetime_now, tmp_path, monkeypatch):
+    # Test that the function appends the expected content to the day's file
+    notes_dir = tmp_path / "notes"
+    monkeypatch.setattr(add_note, "_NOTES_DIR", notes_dir)
 
-    with patch('builtins.open', mock_file), \
-         patch('pathlib.Path.mkdir'):
+    action("remember", "to call mom")
+    action("remember", "  buy bread ")
 
-        action("remember", "to call mom")
+    # The directory is created on first use and both notes land in one file
+    expected_path = notes_dir / "2025-05-28.md"
+    assert expected_path.read_text(encoding="utf-8") == (
+        "- 2025-05-28 19:00 to call mom\n"
+        "- 2025-05-28 19:00 buy bread\n"
+    )
 
-        # Check that the file was opened with the correct path and mode
-        expected_path = Path("knowledge/notes") / "2025-05-28.md"
-        mock_file.assert_called_once_with(
-            expected_path,
-            "a",
-            encoding="utf-8"
-        )
+def test_action_recreates_removed_notes_dir(mock_datetime_now, tmp_path, monkeypatch):
+    notes_dir = tmp_path / "notes"
+    monkeypatch.setattr(add_note, "_NOTES_DIR", notes_dir)
 
-        # Check that the correct content was written to the file
-        mock_file().write.assert_called_once_with(
-            "- 2025-05-28 19:00 to call mom\n"
-        )
+    action("remember", "first")
+    (notes_dir / "2025-05-28.md").unlink()
+    notes_dir.rmdir()
+    action("remember", "second")
+
+    assert (notes_dir / "2025-05-28.md").read_text(encoding="utf-8") == "- 2025-05-28 19:00 second\n"
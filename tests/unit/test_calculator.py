@@ -49,6 +49,11 @@ def test_calculator_functions():
     # Test sqrt function
     assert "result of sqrt(9) is 3" in action("calculate sqrt(9)", "sqrt(9)")
 
+def test_calculator_nested_functions():
+    assert "result of max(1, min(5, 3)) is 3" in action("calculate max(1, min(5, 3))", "max(1, min(5, 3))")
+    assert "result of sqrt(abs(-16)) is 4" in action("calculate sqrt(abs(-16))", "sqrt(abs(-16))")
+    assert "result of round(2.345, 2) is 2.35" in action("calculate round(2.345, 2)", "round(2.345, 2)")
+
 def test_calculator_constants():
     # Test pi constant (approximately)
     result = action("calculate pi", "pi")
@@ -76,3 +81,11 @@ def test_safe_eval_security():
 
     with pytest.raises(Exception):
         safe_eval("open('/etc/passwd').read()")
+
+def test_safe_eval_rejects_huge_powers():
+    # Would otherwise try to build a number with hundreds of millions of digits
+    with pytest.raises(ValueError, match="Exponent too large"):
+        safe_eval("9**9**9")
+
+    assert safe_eval("2**100") == 2 ** 100
+    assert safe_eval("1**100000") == 1
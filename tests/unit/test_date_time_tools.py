@@ -38,3 +38,10 @@ def test_get_time_with_input(mock_datetime):
     """Test that get_time works with user input parameter"""
     result = time_action("what is the time")
     assert "Current time: 14:30:45" in result
+
+def test_get_time_refreshes_after_a_second(mock_datetime):
+    """Test that the memoized time answer changes once the clock moves on"""
+    assert "Current time: 14:30:45" in time_action()
+    with patch('tools.get_time.datetime') as mock_time:
+        mock_time.now.return_value = datetime(2023, 5, 15, 14, 30, 46)
+        assert "Current time: 14:30:46" in time_action()
@@ -7,6 +7,8 @@ from pathlib import Path
 
 import pytest
 
+_NOW = datetime(2024, 1, 1).isoformat()
+
 # --- Psycopg2 stubs ---
 
 class PGError(Exception):
@@ -79,6 +81,11 @@ class FakePsycopg2(types.ModuleType):
 
 ASCENDING = 1
 
+class _Cursor(list):
+    def sort(self, key, direction):
+        super().sort(key=lambda x: x.get(key), reverse=(direction == -1))
+        return self
+
 class FakeCollection:
     def __init__(self):
         self.docs = []
@@ -94,7 +101,7 @@ class FakeCollection:
         for doc in self.docs:
             if all(doc.get(k) == v for k, v in query.items()):
                 if projection:
-                    result = {k: doc.get(k) for k in projection.keys()}
+                    result = {k: doc.get(k) for k in tuple(projection)}
                     return result
                 return doc.copy()
         return None
@@ -124,12 +131,9 @@ class FakeCollection:
     # find with simple sort used by adapter
     def find(self, query, projection=None):
         results = [d.copy() for d in self.docs if all(d.get(k) == v for k, v in query.items())]
-        class _Cursor(list):
-            def sort(self, key, direction):
-                super().sort(key=lambda x: x.get(key), reverse=(direction == -1))
-                return self
         if projection:
-            results = [{k: d.get(k) for k in projection.keys()} for d in results]
+            keys = tuple(projection)
+            results = [{k: d.get(k) for k in keys} for d in results]
         return _Cursor(results)
 
     # aggregation used in list_conversation_meta (not used by our tests, but keep minimal)
@@ -229,6 +233,9 @@ def test_postgres_save_conversation_normalizes_and_derives_title(monkeypatch):
     c1 = FakeCursor(fetchone_returns=[("cat1",), None])
     install_psycopg2_stub([c1])
 
+    import importlib
+    import engine.database.postgres as pg
+    importlib.reload(pg)
     from engine.database.postgres import PostgresAdapter
 
     adapter = PostgresAdapter(connection_string="postgres://stub")
@@ -241,7 +248,7 @@ def test_postgres_save_conversation_normalizes_and_derives_title(monkeypatch):
         "archived": False,
         "tags": ["x"],
         "history": [
-            {"role": "user", "content": "Summarize this long text", "created_at": datetime.now().isoformat()},
+            {"role": "user", "content": "Summarize this long text", "created_at": _NOW},
             {"role": "assistant", "content": "Sure!"},
         ],
     }
@@ -329,7 +336,7 @@ def test_mongodb_save_conversation_normalizes_and_derives_title(monkeypatch):
         "archived": False,
         "tags": ["tag"],
         "messages": [
-            {"role": "user", "content": "Plan a trip", "created_at": datetime.now().isoformat()},
+            {"role": "user", "content": "Plan a trip", "created_at": _NOW},
             {"role": "assistant", "content": "Okay"},
         ],
     }
@@ -370,16 +377,16 @@ def test_mongodb_load_conversation_merges_meta_and_messages(monkeypatch):
         "user_id": "u1",
         "category_id": "cat1",
         "title": "Topic",
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat(),
+        "created_at": _NOW,
+        "updated_at": _NOW,
         "starred": False,
         "archived": False,
         "tags": ["a"],
         "data": {"history": []},
     })
     adapter.db.conversation_messages.insert_many([
-        {"id": "m1", "conversation_id": "c1", "idx": 0, "role": "user", "content": "Hi", "created_at": datetime.now().isoformat()},
-        {"id": "m2", "conversation_id": "c1", "idx": 1, "role": "assistant", "content": "Hello", "created_at": datetime.now().isoformat()},
+        {"id": "m1", "conversation_id": "c1", "idx": 0, "role": "user", "content": "Hi", "created_at": _NOW},
+        {"id": "m2", "conversation_id": "c1", "idx": 1, "role": "assistant", "content": "Hello", "created_at": _NOW},
     ])
 
     res = adapter.load_conversation("u1", "c1")
@@ -521,7 +528,7 @@ def test_postgres_save_conversation_update_and_normalize(monkeypatch):
         "archived": False,
         "tags": ["t"],
         "messages": [
-            {"role": "user", "content": "Make a plan", "created_at": datetime.now().isoformat(), "meta": {"k": 1}},
+            {"role": "user", "content": "Make a plan", "created_at": _NOW, "meta": {"k": 1}},
             {"role": "assistant", "content": "Okay"},
         ],
     }
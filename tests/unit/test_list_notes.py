@@ -1,82 +1,58 @@
 import pytest
-from unittest.mock import patch, MagicMock
-from pathlib import Path
 
+import tools.list_notes as list_notes
 from tools.list_notes import action
 
-def test_action_no_notes():
-    # Test when no notes are found
-    with patch('tools.list_notes.Path.glob') as mock_glob:
-        mock_glob.return_value = []
-        result = action()
-
-        assert "📭 No notes found." in result
-        mock_glob.assert_called_once_with("*.md")
+@pytest.fixture
+def notes_dir(tmp_path, monkeypatch):
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    monkeypatch.setattr(list_notes, "_NOTES_DIR", notes)
+    return notes
 
-def test_action_with_notes():
-    # Test when notes are found
-    with patch('tools.list_notes.Path.glob') as mock_glob, \
-         patch('tools.list_notes.sorted') as mock_sorted:
-        # Create mock Path objects for the note files
-        mock_files = [
-            MagicMock(spec=Path, name="2025-05-28.md"),
-            MagicMock(spec=Path, name="2025-05-29.md"),
-            MagicMock(spec=Path, name="2025-05-30.md"),
-        ]
+def _write_notes(notes_dir, days):
+    for day in days:
+        (notes_dir / f"2025-05-{day}.md").write_text("- note\n", encoding="utf-8")
 
-        # Set the name attribute for each mock
-        for i, mock_file in enumerate(mock_files):
-            mock_file.name = f"2025-05-{28+i}.md"
+def test_action_no_notes(notes_dir):
+    # Test when no notes are found
+    result = action()
 
-        mock_glob.return_value = mock_files
-        # Make sorted return the same list (we're not testing the sorting)
-        mock_sorted.return_value = mock_files
+    assert "📭 No notes found." in result
 
-        result = action()
+def test_action_missing_notes_dir(tmp_path, monkeypatch):
+    # A notes directory that was never created means no notes
+    monkeypatch.setattr(list_notes, "_NOTES_DIR", tmp_path / "missing")
 
-        assert "🗒️ Your notes:" in result
-        assert "- 2025-05-28.md" in result
-        assert "- 2025-05-29.md" in result
-        assert "- 2025-05-30.md" in result
-        mock_glob.assert_called_once_with("*.md")
-        mock_sorted.assert_called_once_with(mock_files)
+    assert "📭 No notes found." in action()
 
-def test_action_with_many_notes():
-    # Test when more than 5 notes are found (should only show the latest 5)
-    with patch('tools.list_notes.Path.glob') as mock_glob, \
-         patch('tools.list_notes.sorted') as mock_sorted:
-        # Create mock Path objects for the note files
-        mock_files = [
-            MagicMock(spec=Path, name="2025-05-25.md"),
-            MagicMock(spec=Path, name="2025-05-26.md"),
-            MagicMock(spec=Path, name="2025-05-27.md"),
-            MagicMock(spec=Path, name="2025-05-28.md"),
-            MagicMock(spec=Path, name="2025-05-29.md"),
-            MagicMock(spec=Path, name="2025-05-30.md"),
-            MagicMock(spec=Path, name="2025-05-31.md"),
-        ]
+def test_action_with_notes(notes_dir):
+    # Test when notes are found
+    _write_notes(notes_dir, [30, 28, 29])
+    # Non-note files and directories are ignored
+    (notes_dir / "readme.txt").write_text("x", encoding="utf-8")
+    (notes_dir / "archive.md").mkdir()
 
-        # Set the name attribute for each mock
-        for i, mock_file in enumerate(mock_files):
-            mock_file.name = f"2025-05-{25+i}.md"
+    result = action()
 
-        mock_glob.return_value = mock_files
-        # Make sorted return the same list (we're not testing the sorting)
-        mock_sorted.return_value = mock_files
+    assert result.splitlines() == [
+        "🗒️ Your notes:",
+        "- 2025-05-28.md",
+        "- 2025-05-29.md",
+        "- 2025-05-30.md",
+    ]
 
-        result = action()
+def test_action_with_many_notes(notes_dir):
+    # Test when more than 5 notes are found (should only show the latest 5)
+    _write_notes(notes_dir, range(25, 32))
 
-        # Should only include the latest 5 files
-        assert "🗒️ Your notes:" in result
-        assert "- 2025-05-27.md" in result
-        assert "- 2025-05-28.md" in result
-        assert "- 2025-05-29.md" in result
-        assert "- 2025-05-30.md" in result
-        assert "- 2025-05-31.md" in result
+    result = action()
 
-        # Should not include the oldest files
-        assert "- 2025-05-25.md" not in result
-        assert "- 2025-05-26.md" not in result
+    # Should only include the latest 5 files
+    assert "🗒️ Your notes:" in result
+    for day in range(27, 32):
+        assert f"- 2025-05-{day}.md" in result
 
-        mock_glob.assert_called_once_with("*.md")
-        mock_sorted.assert_called_once_with(mock_files)
+    # Should not include the oldest files
+    assert "- 2025-05-25.md" not in result
+    assert "- 2025-05-26.md" not in result
@@ -1,3 +1,4 @@
+import re
 import sys
 import types
 import json
@@ -7,6 +8,26 @@ from pathlib import Path
 import pytest
 
 ASCENDING = 1
+_NOW = datetime(2024, 1, 1).isoformat()
+
+class _Cursor(list):
+    def sort(self, key, direction):
+        super().sort(key=lambda x: (x.get(key) is None, (x.get(key) if x.get(key) is not None else "")), reverse=(direction == -1))
+        return self
+
+def _matches(doc, query):
+    # Equality plus the "$or" / "$regex" operators the adapter uses for memory facts
+    for k, v in query.items():
+        if k == "$or":
+            if not any(_matches(doc, q) for q in v):
+                return False
+        elif isinstance(v, dict) and "$regex" in v:
+            flags = re.IGNORECASE if "i" in v.get("$options", "") else 0
+            if not re.search(v["$regex"], doc.get(k) or "", flags):
+                return False
+        elif doc.get(k) != v:
+            return False
+    return True
 
 class FakeCollection:
     def __init__(self):
@@ -17,20 +38,17 @@ class FakeCollection:
         return "idx"
     def find_one(self, query, projection=None):
         for doc in self.docs:
-            if all(doc.get(k) == v for k, v in query.items()):
+            if _matches(doc, query):
                 if projection:
-                    return {k: doc.get(k) for k in projection.keys()}
+                    return {k: doc.get(k) for k in tuple(projection)}
                 return doc.copy()
         return None
     def find(self, query=None, projection=None):
         query = query or {}
-        results = [d.copy() for d in self.docs if all(d.get(k) == v for k, v in query.items())]
-        class _Cursor(list):
-            def sort(self, key, direction):
-                super().sort(key=lambda x: (x.get(key) is None, (x.get(key) if x.get(key) is not None else "")), reverse=(direction == -1))
-                return self
+        results = [d.copy() for d in self.docs if _matches(d, query)]
         if projection:
-            results = [{k: d.get(k) for k in projection.keys()} for d in results]
+            keys = tuple(projection)
+            results = [{k: d.get(k) for k in keys} for d in results]
         return _Cursor(results)
     def insert_one(self, doc):
         self.docs.append(doc.copy())
@@ -43,7 +61,7 @@ class FakeCollection:
         matched = 0
         modified = 0
         for doc in self.docs:
-            if all(doc.get(k) == v for k, v in query.items()):
+            if _matches(doc, query):
                 matched += 1
                 if "$set" in update:
                     doc.update(update["$set"])
@@ -53,12 +71,10 @@ class FakeCollection:
                 modified += 1
         return types.SimpleNamespace(matched_count=matched, modified_count=modified)
     def delete_one(self, query):
-        before = len(self.docs)
-        self.docs = [d for d in self.docs if not all(d.get(k) == v for k, v in query.items())]
-        return types.SimpleNamespace(deleted_count=before - len(self.docs))
+        return self.delete_many(query)
     def delete_many(self, query):
         before = len(self.docs)
-        self.docs = [d for d in self.docs if not all(d.get(k) == v for k, v in query.items())]
+        self.docs = [d for d in self.docs if not _matches(d, query)]
         return types.SimpleNamespace(deleted_count=before - len(self.docs))
     def aggregate(self, pipeline):
         # minimal: emulate pipeline used in list_conversation_meta
@@ -283,8 +299,8 @@ def test_save_and_load_conversation_including_legacy(adapter):
         "user_id": "u1",
         "category_id": adapter.db.categories.find_one({"user_id": "u1", "name": "General"})["id"],
         "title": "Legacy",
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat(),
+        "created_at": _NOW,
+        "updated_at": _NOW,
         "starred": False,
         "archived": False,
         "tags": [],
@@ -389,7 +405,7 @@ def test_api_key_normalization_defaults(adapter):
         "key": "KZ",
         "user_id": "ua",
         "name": None,
-        "created_at": datetime.now().isoformat(),
+        "created_at": _NOW,
         "last_used": None,
         "usage_count": 0,
         "rate_limit": 60,
@@ -413,8 +429,8 @@ def test_load_conversation_legacy_messages_key(adapter):
         "user_id": "u5",
         "category_id": cat_id,
         "title": "Legacy2",
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat(),
+        "created_at": _NOW,
+        "updated_at": _NOW,
         "starred": False,
         "archived": False,
         "tags": [],
@@ -485,8 +501,8 @@ def test_load_conversation_defaults_category_when_missing(adapter):
         "user_id": "u8",
         "category_id": "does-not-exist",
         "title": "T",
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat(),
+        "created_at": _NOW,
+        "updated_at": _NOW,
         "starred": False,
         "archived": False,
         "tags": [],
@@ -505,8 +521,8 @@ def test_load_conversation_malformed_blob_results_empty_history(adapter):
         "user_id": "u9",
         "category_id": cat,
         "title": "T",
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat(),
+        "created_at": _NOW,
+        "updated_at": _NOW,
         "starred": False,
         "archived": False,
         "tags": [],
@@ -548,3 +564,13 @@ def test_create_new_conversation_with_title_and_new_category(adapter):
     # Ensure category created and set on saved conversation
     cats = adapter.list_categories("unew")
     assert "Ideas" in cats
+
+
+def test_memory_facts_keyword_queries(adapter):
+    adapter.add_memory_fact("ut1", "Alice likes green tea", private=True)
+    adapter.add_memory_fact("ut1", "Bob prefers coffee", private=True)
+    coll = adapter.db.memory_facts
+    # search sees both of the user's facts; forget only drops the keyword match
+    assert len(adapter.search_memory("tea", user_id="ut1", include_shared=False, k=5)) == 2
+    assert adapter.forget_memory("TEA", user_id="ut1") == 1
+    assert [d["text"] for d in coll.docs] == ["Bob prefers coffee"]
@@ -1,9 +1,10 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import requests
+from urllib.parse import quote_plus
 
 
-from engine.net import get, USER_AGENTS
+from engine.net import get, quote_query, USER_AGENTS
 
 @pytest.fixture
 def mock_sleep():
@@ -32,7 +33,8 @@ def test_get_successful_request(mock_sleep, mock_random_choice):
         mock_get.assert_called_once_with(
             "https://example.com",
             headers={"User-Agent": USER_AGENTS[0]},
-            timeout=10
+            timeout=10,
+            stream=False
         )
 
         # Verify raise_for_status was called
@@ -110,7 +112,8 @@ def test_get_with_custom_headers(mock_sleep, mock_random_choice):
         mock_get.assert_called_once_with(
             "https://example.com",
             headers=expected_headers,
-            timeout=10
+            timeout=10,
+            stream=False
         )
 
 def test_get_with_custom_timeout_and_retries(mock_sleep, mock_random_choice):
@@ -128,7 +131,8 @@ def test_get_with_custom_timeout_and_retries(mock_sleep, mock_random_choice):
         mock_get.assert_called_once_with(
             "https://example.com",
             headers={"User-Agent": USER_AGENTS[0]},
-            timeout=30
+            timeout=30,
+            stream=False
         )
 
 def test_get_random_user_agent():
@@ -147,7 +151,8 @@ def test_get_random_user_agent():
             mock_get.assert_called_once_with(
                 "https://example.com",
                 headers={"User-Agent": USER_AGENTS[1]},
-                timeout=10
+                timeout=10,
+                stream=False
             )
 
 def test_get_connection_error(mock_sleep, mock_random_choice):
@@ -165,3 +170,29 @@ def test_get_connection_error(mock_sleep, mock_random_choice):
 
         # Verify requests.get was called the correct number of times
         assert mock_get.call_count == 2
+
+def test_get_streaming(mock_sleep, mock_random_choice):
+    """Test that stream=True is passed through to requests."""
+    mock_response = MagicMock()
+    mock_response.raise_for_status.return_value = None
+
+    with patch("requests.get", return_value=mock_response) as mock_get:
+        assert get("https://example.com", stream=True) == mock_response
+
+        mock_get.assert_called_once_with(
+            "https://example.com",
+            headers={"User-Agent": USER_AGENTS[0]},
+            timeout=10,
+            stream=True
+        )
+
+@pytest.mark.parametrize("query", [
+    "python programming",
+    "New York",
+    "C++ & Rust?",
+    "São Paulo",
+    "a/b=c",
+])
+def test_quote_query_matches_quote_plus(query):
+    """Test that the alphanumeric shortcut encodes exactly like quote_plus."""
+    assert quote_query(query) == quote_plus(query)
@@ -1,41 +1,56 @@
+import copy
 import json
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
-import importlib
 import pytest
 
+from fake_fs import FAKE_FS, FakeFSPath
+
 # Minimal local stubs for psycopg2 and FAISS used in these tests
 import types
 import sys
+import uuid
+
+_FIXED_TS = datetime(2024, 1, 1, 0, 0, 0)
+_FIXED_UUID = uuid.UUID(int=0)
 
 class PGError(Exception):
     pass
 
 class FakeCursor:
     def __init__(self, fetchone_returns=None, fetchall_returns=None, rowcount=1):
-        self.fetchone_returns = list(fetchone_returns or [])
-        self.fetchall_returns = list(fetchall_returns or [])
-        self.executed = []
+        # Canned responses are read through an index instead of popped off a list
+        self._fetchone = tuple(fetchone_returns or ())
+        self._i1 = 0
+        self._fetchall = tuple(fetchall_returns or ())
+        self._i2 = 0
         self.rowcount = rowcount
     def execute(self, query, params=None):
-        self.executed.append((" ".join(query.split()), params))
+        pass
     def fetchone(self):
-        if self.fetchone_returns:
-            return self.fetchone_returns.pop(0)
+        if self._i1 < len(self._fetchone):
+            v = self._fetchone[self._i1]
+            self._i1 += 1
+            return v
         return None
     def fetchall(self):
-        if self.fetchall_returns:
-            return self.fetchall_returns.pop(0)
+        if self._i2 < len(self._fetchall):
+            v = self._fetchall[self._i2]
+            self._i2 += 1
+            return v
         return []
 
+def _cur(one=None, many=None, rc=1):
+    """FakeCursor over canned fetchone/fetchall results."""
+    return FakeCursor(one, many, rc)
+
 class FakePGConnection:
     def __init__(self, cursors):
-        self._cursors = list(cursors)
+        self._cursors = deque(cursors)
     def cursor(self, cursor_factory=None):
-        if not self._cursors:
-            return FakeCursor()
-        return self._cursors.pop(0)
+        return self._cursors.popleft() if self._cursors else _cur()
     def commit(self):
         pass
     def rollback(self):
@@ -51,8 +66,7 @@ class FakePsycopg2(types.ModuleType):
         super().__init__("psycopg2")
         self.Error = PGError
         self._next_connection = None
-        extras = FakePGExtras("psycopg2.extras")
-        sys.modules["psycopg2.extras"] = extras
+        self.extras = FakePGExtras("psycopg2.extras")
     def connect(self, dsn):
         if self._next_connection is None:
             return FakePGConnection([])
@@ -60,11 +74,34 @@ class FakePsycopg2(types.ModuleType):
         self._next_connection = None
         return conn
 
+# One stub for the whole module; tests only swap the connection it hands out
+_FAKE = FakePsycopg2()
+
 def install_psycopg2_stub(cursors):
-    fake = FakePsycopg2()
-    fake._next_connection = FakePGConnection(cursors)
-    sys.modules["psycopg2"] = fake
-    return fake
+    _FAKE._next_connection = FakePGConnection(cursors)
+    return _FAKE
+
+@pytest.fixture(scope="module")
+def pg_module():
+    """Import engine.database.postgres once against the stubbed psycopg2."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, "psycopg2", _FAKE)
+        mp.setitem(sys.modules, "psycopg2.extras", _FAKE.extras)
+        import engine.database.postgres as pg
+    return pg
+
+@pytest.fixture
+def pg_stub(pg_module, monkeypatch):
+    """Install the stub for one test and queue the cursors of its next connection.
+
+    monkeypatch restores the previous sys.modules entries on teardown, so no
+    psycopg2 state leaks between tests sharing a worker.
+    """
+    monkeypatch.setitem(sys.modules, "psycopg2", _FAKE)
+    monkeypatch.setitem(sys.modules, "psycopg2.extras", _FAKE.extras)
+    # The module may already be bound to another test file's stub
+    monkeypatch.setattr(pg_module, "psycopg2", _FAKE)
+    return install_psycopg2_stub
 
 class DummyEmbeddings:
     pass
@@ -73,8 +110,7 @@ class DummyVectorStore:
     def __init__(self, docs=None):
         self.docs = docs or []
     def save_local(self, path):
-        Path(path).parent.mkdir(parents=True, exist_ok=True)
-        Path(path).write_text("stub")
+        FAKE_FS.add(str(path))
     def similarity_search_with_score(self, query, k=1):
         from langchain_core.documents import Document as _Doc
         return [(_Doc(page_content="stub", metadata={}), 0.1)]
@@ -88,110 +124,94 @@ class DummyFAISS:
         return DummyVectorStore()
 
 
-def test_postgres_user_crud_and_categories(monkeypatch):
-    # Prepare cursors for: get_user -> dict; list_users -> list; update_user -> existing row then update; list_categories -> names
-    c_get_user = FakeCursor(fetchone_returns=[{"id": "u1", "username": "alice"}])
-    c_list_users = FakeCursor(fetchall_returns=[[{"id": "u1"}, {"id": "u2"}]])
-    # update_user first SELECT returns some row to indicate exists
-    c_update_user = FakeCursor(fetchone_returns=[("u1",)], rowcount=1)
-    # delete_user uses rowcount
-    c_delete_user = FakeCursor(rowcount=1)
-    # list_categories returns tuples
-    c_list_cat = FakeCursor(fetchall_returns=[[("General",), ("Work",)]])
-    # create_user simple cursor
-    c_create_user = FakeCursor()
+def _always_true(*args, **kwargs):
+    return True
 
-    install_psycopg2_stub([c_get_user, c_list_users, c_create_user, c_update_user, c_delete_user, c_list_cat])
 
-    import engine.database.postgres as pg
-    importlib.reload(pg)
-    from engine.database.postgres import PostgresAdapter
-
-    adapter = PostgresAdapter(connection_string="postgres://stub")
-    # Bypass access controls for test
+@pytest.fixture(autouse=True)
+def _bypass_perms(monkeypatch):
+    # Bypass access controls for every adapter call in this module
     import engine.security.database_access as da
-    monkeypatch.setattr(da, "check_permission", lambda user_id, perm, resource_owner_id=None: True)
+    monkeypatch.setattr(da, "check_permission", _always_true)
 
-    # get_user
-    user = adapter.get_user("u1")
-    assert user and user["username"] == "alice"
 
-    # list_users
-    users = adapter.list_users()
-    assert len(users) == 2
+@pytest.fixture
+def adapter(pg_module, pg_stub):
+    return pg_module.PostgresAdapter(connection_string="postgres://stub")
 
-    # create_user
-    uid = adapter.create_user({"id": "u3", "username": "bob", "profile": {"k": 1}})
-    assert uid == "u3"
 
-    # update_user
-    ok_upd = adapter.update_user("u1", {"username": "alice2"})
-    assert ok_upd is True
+def _freeze_uuid(monkeypatch):
+    monkeypatch.setattr(uuid, "uuid4", lambda: _FIXED_UUID)
 
-    # delete_user
-    ok_del = adapter.delete_user("u2")
-    assert ok_del is True
 
-    # list_categories
-    cats = adapter.list_categories("u1")
-    assert cats == ["General", "Work"]
+def _op(op, args, cursor, expected):
+    return pytest.param(op, args, cursor, expected, id=op)
 
 
-def test_postgres_create_delete_conversation_and_move_category(monkeypatch):
-    # move_conversation_to_category path with existing category id and successful update
-    c_move = FakeCursor(fetchone_returns=[("cat1",)], rowcount=1)
-    # delete_conversation rowcount true
-    c_delete = FakeCursor(rowcount=1)
+def _run_op(adapter, pg_stub, op, args, cursor):
+    # Rows are copied per run since the adapter mutates them (e.g. JSON permissions)
+    pg_stub([_cur(**copy.deepcopy(cursor))])
+    return getattr(adapter, op)(*args)
 
-    install_psycopg2_stub([c_move, c_delete])
 
-    import engine.database.postgres as pg
-    importlib.reload(pg)
-    from engine.database.postgres import PostgresAdapter
+@pytest.mark.parametrize("op,args,cursor,expected", [
+    _op("get_user", ("u1",), {"one": [{"id": "u1", "username": "alice"}]}, {"id": "u1", "username": "alice"}),
+    _op("list_users", (), {"many": [[{"id": "u1"}, {"id": "u2"}]]}, [{"id": "u1"}, {"id": "u2"}]),
+    _op("create_user", ({"id": "u3", "username": "bob", "profile": {"k": 1}},), {}, "u3"),
+    # update_user first SELECTs the row to check it exists
+    _op("update_user", ("u1", {"username": "alice2"}), {"one": [("u1",)], "rc": 1}, True),
+    _op("delete_user", ("u2",), {"rc": 1}, True),
+    _op("list_categories", ("u1",), {"many": [[("General",), ("Work",)]]}, ["General", "Work"]),
+])
+def test_postgres_user_and_category_ops(adapter, pg_stub, op, args, cursor, expected):
+    assert _run_op(adapter, pg_stub, op, args, cursor) == expected
 
-    adapter = PostgresAdapter(connection_string="postgres://stub")
-    # Bypass access controls for test
-    import engine.security.database_access as da
-    monkeypatch.setattr(da, "check_permission", lambda user_id, perm, resource_owner_id=None: True)
 
+def test_postgres_create_new_conversation(adapter, monkeypatch):
+    _freeze_uuid(monkeypatch)
     # create_new_conversation by monkeypatching save_conversation to bypass SQL internals
     def _fake_save(user_id, cid, data):
         return True
     adapter.save_conversation = _fake_save
     conv_id = adapter.create_new_conversation("u1", title="Hello", category="General")
-    assert isinstance(conv_id, str) and len(conv_id) > 0
+    assert conv_id == str(_FIXED_UUID)
+
 
-    # move conversation
-    ok_move = adapter.move_conversation_to_category("u1", "c1", "General")
-    assert ok_move is True
+@pytest.mark.parametrize("op,args,cursor,expected", [
+    # existing category id and successful update
+    _op("move_conversation_to_category", ("u1", "c1", "General"), {"one": [("cat1",)], "rc": 1}, True),
+    _op("delete_conversation", ("u1", "c1"), {"rc": 1}, True),
+])
+def test_postgres_conversation_ops(adapter, pg_stub, op, args, cursor, expected):
+    assert _run_op(adapter, pg_stub, op, args, cursor) == expected
 
-    # delete conversation
-    ok_del = adapter.delete_conversation("u1", "c1")
-    assert ok_del is True
 
+_GLOBAL_SETTINGS_JSON = json.dumps({"a": 1}).encode()
+_PROFILE_JSON = json.dumps({"name": "Alice"}).encode()
+_USER_SETTINGS_JSON = json.dumps({"b": 2}).encode()
+_CONVERSATION_JSON = json.dumps({"title": "Hi", "messages": []}).encode()
 
-def test_postgres_migrate_from_files(tmp_path):
-    base = tmp_path
+
+@pytest.fixture(scope="session")
+def migrate_tree(tmp_path_factory):
+    """File-based data layout consumed read-only by migrate_from_files."""
+    base = tmp_path_factory.mktemp("pg_migrate")
     # global settings
-    (base / "settings.json").write_text(json.dumps({"a": 1}), encoding="utf-8")
+    (base / "settings.json").write_bytes(_GLOBAL_SETTINGS_JSON)
     # user structure
     udir = base / "users" / "u1"
-    udir.mkdir(parents=True)
-    (udir / "profile.json").write_text(json.dumps({"name": "Alice"}), encoding="utf-8")
-    (udir / "settings.json").write_text(json.dumps({"b": 2}), encoding="utf-8")
     cdir = udir / "conversations"
-    cdir.mkdir()
-    (cdir / "c1.json").write_text(json.dumps({"title": "Hi", "messages": []}), encoding="utf-8")
+    cdir.mkdir(parents=True)
+    (udir / "profile.json").write_bytes(_PROFILE_JSON)
+    (udir / "settings.json").write_bytes(_USER_SETTINGS_JSON)
+    (cdir / "c1.json").write_bytes(_CONVERSATION_JSON)
+    return base
 
-    # stub DB with minimal cursor
-    c = FakeCursor()
-    install_psycopg2_stub([c])
 
-    import engine.database.postgres as pg
-    importlib.reload(pg)
-    from engine.database.postgres import PostgresAdapter
+def test_postgres_migrate_from_files(migrate_tree, adapter, pg_stub):
+    # stub DB with minimal cursor
+    pg_stub([_cur()])
 
-    adapter = PostgresAdapter(connection_string="postgres://stub")
     # monkeypatch DB-affecting methods to avoid SQL complexity
     calls = {"save_settings": 0, "create_user": 0, "create_category": 0, "save_conversation": 0}
     def _ss(x, user_id=None):
@@ -211,7 +231,7 @@ def test_postgres_migrate_from_files(tmp_path):
     adapter.create_category = _cc
     adapter.save_conversation = _sc
 
-    users_m, conv_m, settings_m = adapter.migrate_from_files(base)
+    users_m, conv_m, settings_m = adapter.migrate_from_files(migrate_tree)
     # 1 global + 1 user settings = 2
     assert settings_m == 2
     assert users_m == 1
@@ -220,75 +240,58 @@ def test_postgres_migrate_from_files(tmp_path):
     assert calls["save_settings"] == 2 and calls["create_user"] == 1 and calls["save_conversation"] == 1
 
 
-def test_postgres_memory_and_api_keys(tmp_path, monkeypatch):
-    # Install DB stub cursors for sequences used:
-    # add_memory_fact uses one cursor; search_memory uses one cursor returning rows; forget/clear use one cursor each
-    fact_row = {"id": "m1", "user_id": "u1", "text": "alpha", "private": True, "created_at": datetime.now(), "embedding_file": str(tmp_path / "vec.faiss")}
-    c_add = FakeCursor()
-    c_search = FakeCursor(fetchall_returns=[[fact_row]])
-    c_forget = FakeCursor(fetchall_returns=[[fact_row]], rowcount=1)
-    c_clear = FakeCursor(fetchall_returns=[[fact_row]], rowcount=1)
-
-    # API key cursors
-    c_get_key = FakeCursor(fetchone_returns=[{"key": "k", "user_id": "u1", "permissions": "[\"admin\"]"}])
-    c_get_user_keys = FakeCursor(fetchall_returns=[[{"key": "k1", "user_id": "u1", "permissions": "[\"user\"]"}, {"key": "k2", "user_id": "u1", "permissions": None}]])
-    c_create_key = FakeCursor()
-    c_update_usage = FakeCursor()
-    c_revoke = FakeCursor()
-    c_stats = FakeCursor(fetchall_returns=[[{"key": "k1", "user_id": "u1", "permissions": "[\"user\"]", "usage_count": 3}]])
-
-    install_psycopg2_stub([c_add, c_search, c_forget, c_clear, c_get_key, c_get_user_keys, c_create_key, c_update_usage, c_revoke, c_stats])
+@pytest.fixture
+def fact_row():
+    return {"id": "m1", "user_id": "u1", "text": "alpha", "private": True, "created_at": _FIXED_TS, "embedding_file": str(Path("vectorstore") / "u1" / "m1.faiss")}
 
-    import engine.database.postgres as pg
-    importlib.reload(pg)
-    from engine.database.postgres import PostgresAdapter
-
-    adapter = PostgresAdapter(connection_string="postgres://stub")
-    # Bypass access controls for test
-    import engine.security.database_access as da
-    monkeypatch.setattr(da, "check_permission", lambda user_id, perm, resource_owner_id=None: True)
 
-    # Patch embeddings and FAISS with lightweight stubs
+@pytest.fixture
+def memory_adapter(adapter, pg_module, monkeypatch, fact_row):
+    # Patch embeddings, FAISS and the adapter's filesystem access with lightweight stubs
     adapter.embeddings = DummyEmbeddings()
-    # Monkeypatch FAISS in module namespace
-    pg.FAISS = DummyFAISS
-
+    monkeypatch.setattr(pg_module, "FAISS", DummyFAISS)
+    monkeypatch.setattr(pg_module, "Path", FakeFSPath)
     # Prepare a fake embedding file for search/forget/clear
-    emb_path = Path(fact_row["embedding_file"])
-    emb_path.parent.mkdir(parents=True, exist_ok=True)
-    emb_path.write_text("stub", encoding="utf-8")
-
-    # add_memory_fact
-    ok_add = adapter.add_memory_fact("u1", "remember alpha", private=True)
-    assert ok_add is True
+    FAKE_FS.clear()
+    FAKE_FS.add(fact_row["embedding_file"])
+    yield adapter
+    FAKE_FS.clear()
 
-    # search_memory should return one result with score
-    results = adapter.search_memory("alpha", user_id="u1", include_shared=False, k=1)
-    assert isinstance(results, list) and results and "score" in results[0]
 
-    # forget_memory should delete 1 and remove file
-    count_forget = adapter.forget_memory("alpha", user_id="u1")
-    assert count_forget == 1
-    assert not emb_path.exists()
+def test_postgres_add_memory_fact(memory_adapter, pg_stub, monkeypatch):
+    _freeze_uuid(monkeypatch)
+    pg_stub([_cur()])
+    assert memory_adapter.add_memory_fact("u1", "remember alpha", private=True) is True
+    # the new fact's embedding was saved next to the seeded one
+    assert str(Path("vectorstore") / "u1" / f"{_FIXED_UUID}.faiss") in FAKE_FS
 
-    # Recreate file for clear
-    emb_path.write_text("stub", encoding="utf-8")
-    count_clear = adapter.clear_memory(user_id="u1")
-    assert count_clear == 1
 
-    # API: get_api_key
-    info = adapter.get_api_key("k")
-    assert info and info["permissions"] == ["admin"]
-
-    # API: get_user_api_keys
-    keys = adapter.get_user_api_keys("u1")
-    assert isinstance(keys, list) and keys[0]["permissions"] == ["user"] and keys[1]["permissions"] is None
+def test_postgres_search_memory(memory_adapter, pg_stub, fact_row):
+    pg_stub([_cur(many=[[fact_row]])])
+    results = memory_adapter.search_memory("alpha", user_id="u1", include_shared=False, k=1)
+    assert isinstance(results, list) and results and "score" in results[0]
 
-    # API: create/update/revoke
-    assert adapter.create_api_key("u1", key="k3", name="n", rate_limit=10, permissions=["user"]) is True
-    assert adapter.update_api_key_usage("k3") is True
-    assert adapter.revoke_api_key("k3") is True
 
-    # API: usage stats
-    stats = adapter.get_api_key_usage_stats("u1")
-    assert stats and stats[0]["usage_count"] == 3
+@pytest.mark.parametrize("op,args", [
+    ("forget_memory", ("alpha",)),
+    ("clear_memory", ()),
+])
+def test_postgres_remove_memory_deletes_fact_and_file(memory_adapter, pg_stub, fact_row, op, args):
+    pg_stub([_cur(many=[[fact_row]], rc=1)])
+    assert getattr(memory_adapter, op)(*args, user_id="u1") == 1
+    assert fact_row["embedding_file"] not in FAKE_FS
+
+
+@pytest.mark.parametrize("op,args,cursor,expected", [
+    _op("get_api_key", ("k",), {"one": [{"key": "k", "user_id": "u1", "permissions": "[\"admin\"]"}]},
+     {"key": "k", "user_id": "u1", "permissions": ["admin"]}),
+    _op("get_user_api_keys", ("u1",), {"many": [[{"key": "k1", "user_id": "u1", "permissions": "[\"user\"]"}, {"key": "k2", "user_id": "u1", "permissions": None}]]},
+     [{"key": "k1", "user_id": "u1", "permissions": ["user"]}, {"key": "k2", "user_id": "u1", "permissions": None}]),
+    _op("create_api_key", ("u1", "k3", "n", 10, ["user"]), {}, True),
+    _op("update_api_key_usage", ("k3",), {}, True),
+    _op("revoke_api_key", ("k3",), {}, True),
+    _op("get_api_key_usage_stats", ("u1",), {"many": [[{"key": "k1", "user_id": "u1", "permissions": "[\"user\"]", "usage_count": 3}]]},
+     [{"key": "k1", "user_id": "u1", "permissions": ["user"], "usage_count": 3}]),
+])
+def test_postgres_api_key_ops(adapter, pg_stub, op, args, cursor, expected):
+    assert _run_op(adapter, pg_stub, op, args, cursor) == expected
@@ -2,6 +2,8 @@ import types
 import sys
 import pytest
 
+from engine import settings_manager as smod
+
 # ------------------------------ Test doubles ---------------------------------
 
 class FakeDB:
@@ -36,28 +38,41 @@ class FakeDB:
 
 # ------------------------------- Fixtures ------------------------------------
 
-@pytest.fixture
-def settings_manager(monkeypatch):
+@pytest.fixture(scope="module")
+def _mgr_and_db():
     """
-    Instantiate SettingsManager with a FakeDB by monkeypatching
-    engine.settings_manager.get_database_adapter. Also ensure lru_cache is
-    cleared between tests.
+    Build one SettingsManager backed by a FakeDB for the whole module by
+    monkeypatching engine.settings_manager.get_database_adapter. Each
+    pytest-xdist worker is its own process, so it gets its own FakeDB.
     """
-    from engine import settings_manager as smod
-
     fake_db = FakeDB()
-    monkeypatch.setattr(smod, "get_database_adapter", lambda: fake_db, raising=True)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(smod, "get_database_adapter", lambda: fake_db, raising=True)
 
-    mgr = smod.SettingsManager()  # this will call initialize_schema()
-    assert fake_db._initialized is True
+        mgr = smod.SettingsManager()  # this will call initialize_schema()
+        assert fake_db._initialized is True
 
-    yield mgr, fake_db
+        yield mgr, fake_db
 
+    # the lru_cache lives on the class, so drop entries pinning this manager
+    mgr.get_settings.cache_clear()
+
+
+@pytest.fixture
+def settings_manager(_mgr_and_db):
+    """
+    Hand out the shared SettingsManager with its FakeDB and lru_cache reset,
+    so every test starts from an empty store.
+    """
+    mgr, fake_db = _mgr_and_db
+    fake_db._store.clear()
+    fake_db.get_calls = 0
+    fake_db.raise_on_get = False
+    fake_db.raise_on_save = False
     # clear the lru_cache on the bound function to avoid cross-test pollution
-    try:
-        mgr.get_settings.cache_clear()
-    except Exception:
-        pass
+    mgr.get_settings.cache_clear()
+
+    yield mgr, fake_db
 
 
 # --------------------------------- Tests -------------------------------------
@@ -147,21 +162,31 @@ def test_override_replaces_non_dict(settings_manager):
     combined = mgr.get_settings(uid)
     assert combined["logging"] == "OFF"  # dict replaced by string
 
-def test_get_settings_db_error_returns_defaults(settings_manager, monkeypatch):
+@pytest.mark.parametrize(
+    "flag, action, check",
+    [
+        pytest.param(
+            "raise_on_get",
+            lambda m: m.get_settings(),
+            # should catch and return a DEFAULT_SETTINGS copy, not the same object
+            lambda r, m: r["llm_backend"] == m.DEFAULT_SETTINGS["llm_backend"] and r is not m.DEFAULT_SETTINGS,
+            id="get_returns_defaults",
+        ),
+        pytest.param(
+            "raise_on_save",
+            lambda m: m.save_settings({"llm_model": "anything"}),
+            lambda r, m: r is False,
+            id="save_returns_false",
+        ),
+    ],
+)
+def test_db_error_paths(settings_manager, flag, action, check):
     mgr, db = settings_manager
 
     # Ensure defaults exist in DB first
     mgr.get_settings()
-    # Now simulate DB get failure
-    db.raise_on_get = True
-
-    s = mgr.get_settings()  # should catch and return DEFAULT_SETTINGS copy
-    assert s["llm_backend"] == mgr.DEFAULT_SETTINGS["llm_backend"]
-    assert s is not mgr.DEFAULT_SETTINGS  # copy, not the same object
-
-def test_save_settings_db_error_returns_false(settings_manager):
-    mgr, db = settings_manager
+    # Now simulate the DB failure; drop the cached view so the action reaches the DB
+    setattr(db, flag, True)
+    mgr.get_settings.cache_clear()
 
-    db.raise_on_save = True
-    ok = mgr.save_settings({"llm_model": "anything"})
-    assert ok is False
+    assert check(action(mgr), mgr)
@@ -4,7 +4,11 @@ import uuid
 import pytest
 
 # Target under test
+import engine.database.sqlite as _sqlite_mod
+import engine.security.access_control as _acl
+import engine.security.database_access as _dbacc
 from engine.database.sqlite import SQLiteAdapter, Document
+from fake_fs import FAKE_FS, FakeFSPath, fake_glob
 
 
 class DummyEmbeddings:
@@ -28,11 +32,15 @@ class DummyFAISS:
         # Just hold onto the docs; ignore embeddings
         return cls(documents)
 
+    @classmethod
+    def from_embeddings(cls, text_embeddings, embedding, metadatas=None):
+        # Keep the texts as docs; ignore the precomputed vectors
+        metadatas = metadatas or [{} for _ in text_embeddings]
+        return cls([Document(page_content=t, metadata=m) for (t, _), m in zip(text_embeddings, metadatas)])
+
     def save_local(self, path):
-        # Simulate saving an index by writing a tiny file
-        p = Path(path)
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text("index")
+        # Simulate saving an index by registering its path
+        FAKE_FS.add(str(path))
 
     @classmethod
     def load_local(cls, path, embeddings):
@@ -44,41 +52,75 @@ class DummyFAISS:
         return [(Document(page_content="match", metadata={}), 0.1)]
 
 
-@pytest.fixture()
-def sqlite_adapter(tmp_path, monkeypatch):
+@pytest.fixture(scope="module")
+def _stub_deps():
     # Patch heavy deps in the module under test
-    import engine.database.sqlite as mod
-    import engine.security.access_control as acl
-    import engine.security.database_access as dbacc
+    with pytest.MonkeyPatch.context() as mp:
+        # Allow all permissions in tests (patch both access points)
+        allow = lambda *args, **kwargs: True
+        mp.setattr(_acl, "check_permission", allow)
+        mp.setattr(_dbacc, "check_permission", allow)
 
-    # Allow all permissions in tests (patch both access points)
-    allow = lambda *args, **kwargs: True
-    monkeypatch.setattr(acl, "check_permission", allow)
-    monkeypatch.setattr(dbacc, "check_permission", allow)
+        # Replace vector store and embeddings with light stubs
+        mp.setattr(_sqlite_mod, "FAISS", DummyFAISS)
+        mp.setattr(_sqlite_mod, "HuggingFaceEmbeddings", DummyEmbeddings)
+        mp.setattr(_sqlite_mod, "Path", FakeFSPath)
 
-    # Replace vector store and embeddings with light stubs
-    monkeypatch.setattr(mod, "FAISS", DummyFAISS)
-    monkeypatch.setattr(mod, "HuggingFaceEmbeddings", DummyEmbeddings)
+        yield
 
-    db_file = tmp_path / "unit_test.db"
-    adapter = SQLiteAdapter(str(db_file))
+
+def _open_adapter(db_path: str) -> SQLiteAdapter:
+    adapter = SQLiteAdapter(db_path)
     assert adapter.connect()
     assert adapter.initialize_schema()
+    return adapter
+
+
+def _reset(adapter: SQLiteAdapter) -> SQLiteAdapter:
+    # The adapter commits after every write, so a SAVEPOINT cannot isolate
+    # tests; empty every table instead of rebuilding the schema.
+    conn = adapter.connection
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    )]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    for table in tables:
+        conn.execute(f'DELETE FROM "{table}"')
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys = ON")
+    return adapter
+
+
+@pytest.fixture(scope="module")
+def _adapter(_stub_deps):
+    # Path is patched to FakeFSPath, so the vectorstore never touches disk and
+    # an in-memory database serves every test
+    adapter = _open_adapter(":memory:")
 
     yield adapter
 
     adapter.disconnect()
 
 
-def _create_user(adapter: SQLiteAdapter, user_id: str = None):
+@pytest.fixture()
+def sqlite_adapter(_adapter):
+    FAKE_FS.clear()
+    return _reset(_adapter)
+
+
+# Tables are emptied between tests, so fixed ids never collide
+_CONV_ID = str(uuid.UUID(int=2))
+_API_KEY = f"k-{3:032x}"
+
+# Only id/username vary per user; create_user never mutates the profile
+_USER_TEMPLATE = {"created_at": "2025-01-01T00:00:00", "profile": {"name": "Test", "prefs": {"a": 1}}}
+_RENAMED_PROFILE_JSON = json.dumps({"name": "Renamed"})
+
+
+def _create_user(adapter: SQLiteAdapter, user_id: str = None, int_seed: int = 1):
     if user_id is None:
-        user_id = str(uuid.uuid4())
-    data = {
-        "id": user_id,
-        "username": f"user_{user_id[:8]}",
-        "created_at": "2025-01-01T00:00:00",
-        "profile": {"name": "Test", "prefs": {"a": 1}},
-    }
+        user_id = str(uuid.UUID(int=int_seed))
+    data = {**_USER_TEMPLATE, "id": user_id, "username": f"user_{user_id[:8]}"}
     created_id = adapter.create_user(data)
     assert created_id == user_id
     return user_id
@@ -100,8 +142,7 @@ def test_user_crud_and_settings(sqlite_adapter: SQLiteAdapter):
 
     # update_user with username and profile string-json
     new_username = "renamed"
-    new_profile = {"name": "Renamed"}
-    ok = sqlite_adapter.update_user(user_id, {"username": new_username, "profile": json.dumps(new_profile)})
+    ok = sqlite_adapter.update_user(user_id, {"username": new_username, "profile": _RENAMED_PROFILE_JSON})
     assert ok
     u2 = sqlite_adapter.get_user(user_id)
     assert u2["username"] == new_username
@@ -122,7 +163,7 @@ def test_user_crud_and_settings(sqlite_adapter: SQLiteAdapter):
 
 def test_conversation_save_load_and_meta(sqlite_adapter: SQLiteAdapter):
     user_id = _create_user(sqlite_adapter)
-    conv_id = str(uuid.uuid4())
+    conv_id = _CONV_ID
 
     # Provide placeholder title to trigger derivation from first user message
     data = {
@@ -173,7 +214,7 @@ def test_create_new_conversation(sqlite_adapter: SQLiteAdapter):
 
 def test_save_conversation_invalid_history_raises(sqlite_adapter: SQLiteAdapter):
     user_id = _create_user(sqlite_adapter)
-    conv_id = str(uuid.uuid4())
+    conv_id = _CONV_ID
     data = {
         "title": "x",
         "history": "not-a-list",
@@ -183,18 +224,18 @@ def test_save_conversation_invalid_history_raises(sqlite_adapter: SQLiteAdapter)
         sqlite_adapter.save_conversation(user_id, conv_id, data)
 
 
-def test_memory_add_search_forget_clear(sqlite_adapter: SQLiteAdapter, tmp_path):
+def test_memory_add_search_forget_clear(sqlite_adapter: SQLiteAdapter):
     user_id = _create_user(sqlite_adapter)
+    vs_root = Path(sqlite_adapter.db_path).parent / "vectorstore"
+    vec_dir = vs_root / user_id
+    shared_dir = vs_root / "shared"
 
     # Add a private memory fact
     ok = sqlite_adapter.add_memory_fact(user_id, "Buy milk tomorrow", private=True)
     assert ok
 
-    # Vectorstore path should exist under vectorstore/<user_id>
-    vec_dir = Path(sqlite_adapter.db_path).parent / "vectorstore" / user_id
-    assert vec_dir.exists()
-    # There should be exactly one .faiss file
-    files = list(vec_dir.glob("*.faiss"))
+    # There should be exactly one .faiss index under vectorstore/<user_id>
+    files = fake_glob(vec_dir)
     assert len(files) == 1
 
     # Search returns one result with a score
@@ -208,22 +249,19 @@ def test_memory_add_search_forget_clear(sqlite_adapter: SQLiteAdapter, tmp_path)
     n = sqlite_adapter.forget_memory("milk", user_id=user_id, forget_shared=False)
     assert n >= 1
     # Files for that user get deleted (at least the one we created)
-    files_after = list(vec_dir.glob("*.faiss"))
+    files_after = fake_glob(vec_dir)
     assert len(files_after) == 0
 
     # Add two public (shared) facts and clear shared
-    ok1 = sqlite_adapter.add_memory_fact(None, "Shared tip one", private=False)
-    ok2 = sqlite_adapter.add_memory_fact(None, "Shared tip two", private=False)
-    assert ok1 and ok2
+    added = sqlite_adapter.add_memory_facts(None, ["Shared tip one", "Shared tip two"], private=False)
+    assert added == 2
 
-    shared_dir = Path(sqlite_adapter.db_path).parent / "vectorstore" / "shared"
-    assert shared_dir.exists()
-    assert len(list(shared_dir.glob("*.faiss"))) == 2
+    assert len(fake_glob(shared_dir)) == 2
 
     # Clear shared memory (passing None means system/all)
     cleared = sqlite_adapter.clear_memory(user_id=None, clear_shared=True)
     assert cleared >= 2
-    assert len(list(shared_dir.glob("*.faiss"))) == 0
+    assert len(fake_glob(shared_dir)) == 0
 
 def test_categories_and_delete_conversation(sqlite_adapter: SQLiteAdapter):
     user_id = _create_user(sqlite_adapter)
@@ -251,7 +289,7 @@ def test_categories_and_delete_conversation(sqlite_adapter: SQLiteAdapter):
 def test_api_key_lifecycle(sqlite_adapter: SQLiteAdapter):
     user_id = _create_user(sqlite_adapter)
 
-    key = "k-" + uuid.uuid4().hex
+    key = _API_KEY
     # Create with custom name, rate limit and permissions
     ok = sqlite_adapter.create_api_key(user_id, key, name="CI", rate_limit=120, permissions=["read", "write"])
     assert ok
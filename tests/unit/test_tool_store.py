@@ -1,3 +1,5 @@
+import re
+
 import pytest
 from unittest.mock import MagicMock
 
@@ -74,6 +76,9 @@ def test_load_tools():
         assert "pattern" in tool
         assert "action" in tool
         assert callable(tool["action"])
+        # Patterns are compiled once at load time, case-insensitively
+        assert tool["compiled_pattern"].pattern == tool["pattern"]
+        assert tool["compiled_pattern"].flags & re.IGNORECASE
 
 def test_match_and_run_tools_with_mock_tools():
     """Test match_and_run_tools with mock tools."""
@@ -211,3 +216,21 @@ def test_match_and_run_tools_case_insensitive():
 
     # Verify the result
     assert result == "Tool result"
+
+def test_match_and_run_tools_prefers_compiled_pattern():
+    """Test that a precompiled pattern is used instead of the raw string."""
+    mock_action = MagicMock(return_value="Tool result")
+    tools = [
+        {
+            "name": "test_tool",
+            "description": "Test tool",
+            "pattern": r"never matches",
+            "compiled_pattern": re.compile(r"run test (?P<param>\w+)", re.IGNORECASE),
+            "action": mock_action
+        }
+    ]
+
+    result = match_and_run_tools("RUN TEST parameter", tools)
+
+    mock_action.assert_called_once_with("RUN TEST parameter", param="parameter")
+    assert result == "Tool result"
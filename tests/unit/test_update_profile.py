@@ -1,96 +1,107 @@
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
+import contextlib
+import io
 import json
 
+import pytest
+
 from tools.update_profile import action
 
 class MockPath:
     """A mock Path object that can be configured to exist or not exist."""
-    def __init__(self, exists=True):
+    def __init__(self, exists=True, path="profile.json"):
         self.exists_value = exists
-        self.path = "profile.json"
+        self.path = path
     def exists(self):
         return self.exists_value
+    @property
+    def name(self):
+        return self.path
+    def with_name(self, name):
+        return MockPath(exists=False, path=name)
     def __str__(self):
         return self.path
 
-def test_action_creates_new_profile():
-    mock_file = mock_open()
-    mock_path = MockPath(exists=False)
-
-    with patch('tools.update_profile.PROFILE_PATH', mock_path), \
-         patch('builtins.open', mock_file), \
-         patch('json.dump') as mock_dump:
+class _FakeOpen:
+    """Stand-in for open(): serves read_data and keeps what was written."""
+    def __init__(self, read_data=""):
+        self.read_data = read_data
+        self.calls = []
+        self._written = io.StringIO()
+    def __call__(self, path, mode="r", encoding=None):
+        self.calls.append((str(path), mode))
+        if "w" in mode:
+            self._written = io.StringIO()
+            return contextlib.nullcontext(self._written)
+        return contextlib.nullcontext(io.StringIO(self.read_data))
+    @property
+    def written(self):
+        return json.loads(self._written.getvalue())
+
+def _run(initial, exists):
+    """Run action("theme", "dark") against a profile holding initial (None = no file)."""
+    read_data = json.dumps(initial) if initial is not None else ""
+    fake_open = _FakeOpen(read_data)
+
+    with patch('tools.update_profile.PROFILE_PATH', MockPath(exists=exists)), \
+         patch('builtins.open', fake_open), \
+         patch('tools.update_profile.os.replace') as mock_replace:
 
         result = action("theme", "dark")
 
-        assert "Preference 'theme' updated to 'dark'" in result
-
-        mock_file.assert_called_once_with(mock_path, "w", encoding="utf-8")
-        # Should create a profile with only preferences
-        mock_dump.assert_called_once_with({"preferences": {"theme": "dark"}}, mock_file(), indent=2)
-
-def test_action_updates_existing_profile():
-    data = {
-        "name": "Test User",
-        "preferences": {
-            "language": "en"
-        }
-    }
-    mock_file = mock_open(read_data=json.dumps(data))
-    mock_path = MockPath(exists=True)
-
-    with patch('tools.update_profile.PROFILE_PATH', mock_path), \
-         patch('builtins.open', mock_file), \
-         patch('json.dump') as mock_dump:
-
-        result = action("theme", "dark")
+    # The temp file is swapped in over the profile
+    (src, dst), _ = mock_replace.call_args
+    assert (str(src), str(dst)) == ("profile.json.tmp", "profile.json")
+    return result, fake_open
+
+@pytest.mark.parametrize("initial, exists, expected", [
+    # Should create a profile with only preferences
+    pytest.param(None, False, {"preferences": {"theme": "dark"}}, id="creates_new_profile"),
+    pytest.param(
+        {"name": "Test User", "preferences": {"language": "en"}}, True,
+        {"name": "Test User", "preferences": {"language": "en", "theme": "dark"}},
+        id="updates_existing_profile",
+    ),
+    pytest.param(
+        {"preferences": {"theme": "light"}}, True,
+        {"preferences": {"theme": "dark"}},
+        id="updates_existing_preference",
+    ),
+])
+def test_action_writes_profile(initial, exists, expected):
+    result, fake_open = _run(initial, exists)
+
+    assert "Preference 'theme' updated to 'dark'" in result
+
+    expected_opens = [("profile.json.tmp", "w")]
+    if exists:
+        expected_opens.insert(0, ("profile.json", "r"))
+    assert fake_open.calls == expected_opens
+    assert fake_open.written == expected
 
-        assert "Preference 'theme' updated to 'dark'" in result
-        assert mock_file.call_count == 2
-        mock_file.assert_any_call(mock_path, "r", encoding="utf-8")
-        mock_file.assert_any_call(mock_path, "w", encoding="utf-8")
-
-        expected = {
-            "name": "Test User",
-            "preferences": {
-                "language": "en",
-                "theme": "dark"
-            }
-        }
-        mock_dump.assert_called_once_with(expected, mock_file(), indent=2)
-
-def test_action_updates_existing_preference():
-    data = {
-        "preferences": {
-            "theme": "light"
-        }
-    }
-    mock_file = mock_open(read_data=json.dumps(data))
+def test_action_with_json_error():
+    # json.load is patched to fail, so the file content is never parsed
+    fake_open = _FakeOpen()
     mock_path = MockPath(exists=True)
 
     with patch('tools.update_profile.PROFILE_PATH', mock_path), \
-         patch('builtins.open', mock_file), \
-         patch('json.dump') as mock_dump:
+         patch('builtins.open', fake_open), \
+         patch('tools.update_profile.os.replace'), \
+         patch('json.load', side_effect=json.JSONDecodeError("Invalid JSON", "", 0)):
 
         result = action("theme", "dark")
         assert "Preference 'theme' updated to 'dark'" in result
-        assert mock_file.call_count == 2
-        expected = {
-            "preferences": {
-                "theme": "dark"
-            }
-        }
-        mock_dump.assert_called_once_with(expected, mock_file(), indent=2)
+        assert fake_open.written == {"preferences": {"theme": "dark"}}
 
-def test_action_with_json_error():
-    mock_file = mock_open(read_data="invalid json")
-    mock_path = MockPath(exists=True)
+def test_action_replaces_profile_atomically(tmp_path, monkeypatch):
+    profile_path = tmp_path / "profile.json"
+    profile_path.write_text(json.dumps({"name": "Test User"}), encoding="utf-8")
+    monkeypatch.setattr('tools.update_profile.PROFILE_PATH', profile_path)
 
-    with patch('tools.update_profile.PROFILE_PATH', mock_path), \
-         patch('builtins.open', mock_file), \
-         patch('json.load', side_effect=json.JSONDecodeError("Invalid JSON", "", 0)), \
-         patch('json.dump') as mock_dump:
+    action("theme", "dark")
 
-        result = action("theme", "dark")
-        assert "Preference 'theme' updated to 'dark'" in result
-        mock_dump.assert_called_once_with({"preferences": {"theme": "dark"}}, mock_file(), indent=2)
+    assert json.loads(profile_path.read_text(encoding="utf-8")) == {
+        "name": "Test User", "preferences": {"theme": "dark"}
+    }
+    # No temp file is left behind
+    assert [p.name for p in tmp_path.iterdir()] == ["profile.json"]
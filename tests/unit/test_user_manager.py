@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 import sys
 import pytest
 
+from engine import user_manager as umod
+
 # ---- Fakes / test doubles ----------------------------------------------------
 
 class FakeDB:
@@ -11,6 +13,7 @@ class FakeDB:
     def __init__(self):
         self.users = {}  # id -> user dict
         self._initialized = False
+        self._list_cache = None  # rows for list_users, rebuilt after writes
 
     # API expected by UserManager
     def initialize_schema(self):
@@ -22,27 +25,33 @@ class FakeDB:
             return None
         # emulate DB persistence (store shallow copy)
         self.users[uid] = dict(user_data)
+        self._list_cache = None
         return uid
 
     def get_user(self, user_id: str):
         u = self.users.get(user_id)
         if not u:
             return None
-        # emulate DB row return (dict)
-        return dict(u)
+        # emulate DB row return: a zero-copy read-only view
+        return types.MappingProxyType(u)
 
     def update_user(self, user_id: str, updates: dict):
         if user_id not in self.users:
             return False
-        self.users[user_id].update(updates)
+        # copy-on-write so rows handed out earlier keep their snapshot
+        self.users[user_id] = {**self.users[user_id], **updates}
+        self._list_cache = None
         return True
 
     def delete_user(self, user_id: str):
+        self._list_cache = None
         return self.users.pop(user_id, None) is not None
 
     def list_users(self):
         # emulate DB list of rows
-        return [dict(v) for v in self.users.values()]
+        if self._list_cache is None:
+            self._list_cache = [types.MappingProxyType(v) for v in self.users.values()]
+        return self._list_cache
 
 class FakeSettingsManager:
     def __init__(self):
@@ -59,11 +68,14 @@ class FakeACM:
 
 # ---- Fixtures / patching -----------------------------------------------------
 
-@pytest.fixture
-def patch_access_control(monkeypatch):
+@pytest.fixture(scope="module")
+def _um_module():
     """
-    Create a fake module 'engine.security.access_control' with get_access_control_manager()
-    so 'from engine.security.access_control import get_access_control_manager' works.
+    Patch engine.user_manager's dependencies once for this module.
+
+    Installs a fake 'engine.security.access_control' with get_access_control_manager()
+    so 'from engine.security.access_control import get_access_control_manager' works,
+    and swaps SettingsManager for FakeSettingsManager. Both are undone at module end.
     """
     mod = types.ModuleType("engine.security.access_control")
     acm = FakeACM()
@@ -71,33 +83,41 @@ def patch_access_control(monkeypatch):
         return acm
     mod.get_access_control_manager = get_access_control_manager
 
-    # ensure package parents exist
-    pkg_engine = sys.modules.setdefault("engine", types.ModuleType("engine"))
-    pkg_engine_security = sys.modules.setdefault("engine.security", types.ModuleType("engine.security"))
-    sys.modules["engine.security.access_control"] = mod
-    yield acm
-    # (We leave modules in sys.modules; harmless for test run.)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, "engine.security.access_control", mod)
+        mp.setattr(umod, "SettingsManager", FakeSettingsManager, raising=True)
+        yield acm
 
 @pytest.fixture
-def user_manager(monkeypatch):
-    # Import the module under test after patching its dependencies.
-    import importlib
-    # Patch dependencies visible from engine.user_manager
-    from engine import user_manager as umod
-
-    # Patch SettingsManager and get_database_adapter
-    monkeypatch.setattr(umod, "SettingsManager", FakeSettingsManager, raising=True)
+def patch_access_control(_um_module):
+    _um_module.added.clear()
+    return _um_module
 
+@pytest.fixture
+def user_manager(_um_module):
     fake_db = FakeDB()
-    monkeypatch.setattr(umod, "get_database_adapter", lambda: fake_db, raising=True)
-
-    # Recreate instance now that patches applied
-    mgr = umod.UserManager()
+    mgr = umod.UserManager(db_adapter=fake_db)
     # Sanity: schema init happened
     assert fake_db._initialized is True
     mgr._test_db = fake_db  # expose for assertions
     return mgr
 
+@pytest.fixture
+def created_user(request, user_manager):
+    """Indirect fixture: create (username, password) unless password is None."""
+    username, password = request.param
+    if password is not None:
+        user_manager.create_user(username, password)
+    return user_manager, username
+
+@pytest.fixture
+def authed_user(user_manager):
+    """A single created user ("u"/"pw") with a live session: (mgr, username, token)."""
+    user_manager.create_user("u", "pw")
+    ok, token = user_manager.authenticate("u", "pw")
+    assert ok and token
+    return user_manager, "u", token
+
 # ---- Helpers -----------------------------------------------------------------
 
 def extract_profile(urow):
@@ -136,36 +156,32 @@ def test_create_guest_privacy_defaults_hardened(user_manager):
 
 # ---- Auth / session ----------------------------------------------------------
 
-def test_authenticate_success_and_session(user_manager):
-    user_manager.create_user("bob", "hunter2")
-    ok, token = user_manager.authenticate("bob", "hunter2")
-    assert ok and token
-    # validate session
-    assert user_manager.validate_session(token) == "bob"
-
-def test_authenticate_wrong_password(user_manager):
-    user_manager.create_user("carol", "goodpw")
-    ok, token = user_manager.authenticate("carol", "badpw")
-    assert not ok and token is None
-
-def test_authenticate_no_user(user_manager):
-    ok, token = user_manager.authenticate("nouser", "x")
-    assert not ok and token is None
-
-def test_validate_session_expired(user_manager):
-    user_manager.create_user("dave", "pw")
-    ok, token = user_manager.authenticate("dave", "pw")
-    assert ok and token
+@pytest.mark.parametrize("created_user, try_pw, expected_ok", [
+    pytest.param(("bob", "hunter2"), "hunter2", True, id="success_and_session"),
+    pytest.param(("carol", "goodpw"), "badpw", False, id="wrong_password"),
+    pytest.param(("nouser", None), "x", False, id="no_user"),
+], indirect=["created_user"])
+def test_authenticate(created_user, try_pw, expected_ok):
+    user_manager, username = created_user
+    ok, token = user_manager.authenticate(username, try_pw)
+    assert ok is expected_ok
+    if expected_ok:
+        assert token
+        # validate session
+        assert user_manager.validate_session(token) == username
+    else:
+        assert token is None
+
+def test_validate_session_expired(authed_user):
+    user_manager, _, token = authed_user
     # force expire
     user_manager._sessions[token]["expires"] = (datetime.now() - timedelta(seconds=1)).isoformat()
     assert user_manager.validate_session(token) is None
     # token removed
     assert token not in user_manager._sessions
 
-def test_logout(user_manager):
-    user_manager.create_user("eva", "pw")
-    ok, token = user_manager.authenticate("eva", "pw")
-    assert ok
+def test_logout(authed_user):
+    user_manager, _, token = authed_user
     assert user_manager.logout(token) is True
     assert user_manager.validate_session(token) is None
     # logging out again -> False
@@ -203,74 +219,82 @@ def test_list_users_formats_fields(user_manager):
     # has created_at
     assert all("created_at" in u for u in users)
 
-def test_delete_user_removes_sessions(user_manager):
-    user_manager.create_user("hank", "pw")
-    ok, token = user_manager.authenticate("hank", "pw")
-    assert ok and token in user_manager._sessions
-    assert user_manager.delete_user("hank") is True
+def test_delete_user_removes_sessions(authed_user):
+    user_manager, username, token = authed_user
+    assert token in user_manager._sessions
+    assert user_manager.delete_user(username) is True
     assert token not in user_manager._sessions
-    assert user_manager._test_db.get_user("hank") is None
+    assert user_manager._test_db.get_user(username) is None
+
+class _NoScanDict(dict):
+    """Session store that fails the test if anything walks every session."""
+    def items(self):
+        raise AssertionError("sessions were scanned")
+    def __iter__(self):
+        raise AssertionError("sessions were scanned")
+
+def test_delete_user_does_not_scan_sessions(user_manager):
+    user_manager._sessions = _NoScanDict()
+    tokens = {}
+    for i in range(100):
+        username = f"user{i}"
+        user_manager.create_user(username, "pw")
+        tokens[username] = user_manager.authenticate(username, "pw")[1]
+    assert user_manager.delete_user("user0") is True
+    assert tokens["user0"] not in user_manager._sessions
+    assert "user0" not in user_manager._user_tokens
+    # other users keep their sessions
+    assert user_manager.validate_session(tokens["user1"]) == "user1"
 
 # ---- Password change ---------------------------------------------------------
 
-def test_change_password_success(user_manager):
-    user_manager.create_user("ivy", "oldpw")
-    ok, msg = user_manager.change_password("ivy", "oldpw", "newpw")
-    assert ok and "successfully" in msg
-    # old no longer works; new works
-    assert user_manager.authenticate("ivy", "oldpw")[0] is False
-    assert user_manager.authenticate("ivy", "newpw")[0] is True
-
-def test_change_password_wrong_current(user_manager):
-    user_manager.create_user("jack", "pw")
-    ok, msg = user_manager.change_password("jack", "WRONG", "npw")
-    assert not ok and "Current password is incorrect" in msg
-
-def test_change_password_user_not_found(user_manager):
-    ok, msg = user_manager.change_password("missing", "x", "y")
-    assert not ok and "User not found" in msg
+@pytest.mark.parametrize("created_user, current_pw, new_pw, expected_ok, expected_msg", [
+    pytest.param(("ivy", "oldpw"), "oldpw", "newpw", True, "successfully", id="success"),
+    pytest.param(("jack", "pw"), "WRONG", "npw", False, "Current password is incorrect", id="wrong_current"),
+    pytest.param(("missing", None), "x", "y", False, "User not found", id="user_not_found"),
+], indirect=["created_user"])
+def test_change_password(created_user, current_pw, new_pw, expected_ok, expected_msg):
+    user_manager, username = created_user
+    ok, msg = user_manager.change_password(username, current_pw, new_pw)
+    assert ok is expected_ok and expected_msg in msg
+    if expected_ok:
+        # old no longer works; new works
+        assert user_manager.authenticate(username, current_pw)[0] is False
+        assert user_manager.authenticate(username, new_pw)[0] is True
 
 # ---- Avatar & typed section helpers -----------------------------------------
 
-def test_set_and_get_avatar(user_manager):
-    user_manager.create_user("kate", "pw")
-    assert user_manager.set_avatar("kate", "/path/to/avatar.png") is True
-    assert user_manager.get_avatar("kate") == "/path/to/avatar.png"
-
-def test_preferences_personalization_privacy_helpers(user_manager):
+def test_set_and_get_avatar(authed_user):
+    user_manager, username, _ = authed_user
+    assert user_manager.set_avatar(username, "/path/to/avatar.png") is True
+    assert user_manager.get_avatar(username) == "/path/to/avatar.png"
+
+@pytest.mark.parametrize("setter, getter, payload, check", [
+    ("update_preferences", "get_preferences", {"theme": "dark"}, lambda p: p["theme"] == "dark"),
+    ("update_personalization", "get_personalization", {"favorite_tools": ["x"]}, lambda p: "x" in p["favorite_tools"]),
+    ("update_privacy_settings", "get_privacy_settings", {"store_history": False}, lambda p: p["store_history"] is False),
+], ids=["prefs", "pers", "priv"])
+def test_profile_section_helpers(user_manager, setter, getter, payload, check):
     user_manager.create_user("leo", "pw")
-    assert user_manager.update_preferences("leo", {"theme": "dark"}) is True
-    assert user_manager.get_preferences("leo")["theme"] == "dark"
-
-    assert user_manager.update_personalization("leo", {"favorite_tools": ["x"]}) is True
-    assert "x" in user_manager.get_personalization("leo")["favorite_tools"]
-
-    assert user_manager.update_privacy_settings("leo", {"store_history": False}) is True
-    assert user_manager.get_privacy_settings("leo")["store_history"] is False
+    assert getattr(user_manager, setter)("leo", payload) is True
+    assert check(getattr(user_manager, getter)("leo"))
 
 # ---- Interests list ops ------------------------------------------------------
 
-def test_add_interest_creates_sections_and_is_idempotent(user_manager):
-    user_manager.create_user("mia", "pw")
-    assert user_manager.add_interest("mia", "python") is True
-    # add again -> still True and not duplicated
-    assert user_manager.add_interest("mia", "python") is True
-    prof = user_manager.get_profile("mia")
-    assert prof["personalization"]["interests"] == ["python"]
-
-def test_remove_interest_missing_sections_is_noop(user_manager):
-    user_manager.create_user("nick", "pw")
-    # set profile without personalization to simulate missing sections
-    row = user_manager._test_db.get_user("nick")
-    prof = extract_profile(row)
-    prof.pop("personalization", None)
-    user_manager.save_profile("nick", prof)
-    # removing non-existing interest should be True (noop)
-    assert user_manager.remove_interest("nick", "ml") is True
-
-def test_remove_interest_existing(user_manager):
-    user_manager.create_user("olga", "pw")
-    user_manager.add_interest("olga", "ai")
-    assert user_manager.remove_interest("olga", "ai") is True
-    prof = user_manager.get_profile("olga")
-    assert "ai" not in prof["personalization"]["interests"]
+@pytest.mark.parametrize("strip_personalization, ops, final", [
+    # add twice -> still True and not duplicated
+    pytest.param(False, [("add", "python"), ("add", "python")], ["python"], id="add_is_idempotent"),
+    pytest.param(False, [("add", "ai"), ("remove", "ai")], [], id="remove_existing"),
+    # removing a non-existing interest from a profile without personalization is a noop
+    pytest.param(True, [("remove", "ml")], [], id="remove_missing_is_noop"),
+])
+def test_interest_ops(authed_user, strip_personalization, ops, final):
+    user_manager, username, _ = authed_user
+    if strip_personalization:
+        prof = extract_profile(user_manager._test_db.get_user(username))
+        prof.pop("personalization", None)
+        user_manager.save_profile(username, prof)
+    for op, interest in ops:
+        assert getattr(user_manager, f"{op}_interest")(username, interest) is True
+    prof = user_manager.get_profile(username)
+    assert prof["personalization"].get("interests", []) == final
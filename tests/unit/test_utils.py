@@ -3,44 +3,29 @@ import types
 import pytest
 from unittest.mock import MagicMock, patch
 
-@pytest.fixture(autouse=True)
-def mock_dependencies(monkeypatch):
-    # Patch langchain_community and langchain_huggingface
-    fake_FAISS = MagicMock()
-    fake_HuggingFaceEmbeddings = MagicMock()
-    sys.modules['langchain_community'] = MagicMock()
-    sys.modules['langchain_community.vectorstores'] = MagicMock(FAISS=fake_FAISS)
-    sys.modules['langchain_community.embeddings'] = MagicMock(HuggingFaceEmbeddings=fake_HuggingFaceEmbeddings)
-    sys.modules['langchain_huggingface'] = MagicMock(HuggingFaceEmbeddings=fake_HuggingFaceEmbeddings)
-    sys.modules['langchain_core.documents'] = MagicMock(Document=MagicMock())
-    sys.modules['engine.logging_config'] = MagicMock(get_logger=MagicMock(return_value=MagicMock()))
-    sys.modules['engine.error_handling'] = MagicMock(VectorStoreError=Exception)
-    yield
+# conftest.py shims the heavyweight imports this module pulls in
+import engine.utils as utils
 
 def test_configure_logging(monkeypatch):
     import sys
     import types
 
-    # Prepare a module in sys.modules
+    # configure_logging imports engine.logging_config at call time
     fake_logger = MagicMock()
     fake_logging_config = types.ModuleType("engine.logging_config")
     fake_logging_config.get_logger = lambda name=None: fake_logger
-    sys.modules["engine.logging_config"] = fake_logging_config
+    monkeypatch.setitem(sys.modules, "engine.logging_config", fake_logging_config)
 
-    import engine.utils as utils
     logger = utils.configure_logging("abc")
     assert logger is fake_logger
 
 def test_get_embedding_model(monkeypatch):
-    import engine.utils as utils
     fake_Embed = MagicMock()
     monkeypatch.setattr(utils, "HuggingFaceEmbeddings", lambda model_name: fake_Embed)
     result = utils.get_embedding_model("foobar")
     assert result is fake_Embed
 
 def test_save_vectorstore(monkeypatch, tmp_path):
-    import engine.utils as utils
-
     fake_FAISS = MagicMock()
     fake_vectorstore = MagicMock()
     fake_FAISS.from_documents.return_value = fake_vectorstore
@@ -59,7 +44,6 @@ def test_save_vectorstore(monkeypatch, tmp_path):
     assert out2 is fake_vectorstore
 
 def test_load_metadata(monkeypatch, tmp_path):
-    import engine.utils as utils
     # Write valid metadata file
     metadata = {"project_info": {"foo": 42}}
     with open(tmp_path / "metadata.json", "w") as f:
@@ -78,8 +62,6 @@ def test_load_metadata(monkeypatch, tmp_path):
     assert result is None
 
 def test_load_vectorstore(monkeypatch, tmp_path):
-    import engine.utils as utils
-
     # No index.faiss
     assert utils.load_vectorstore(tmp_path) is None
 
@@ -97,7 +79,6 @@ def test_load_vectorstore(monkeypatch, tmp_path):
     assert utils.load_vectorstore(tmp_path) is None
 
 def test_refresh_vectorstore(monkeypatch, tmp_path):
-    import engine.utils as utils
     monkeypatch.setattr(utils, "load_vectorstore", lambda *a, **k: "VECTORSTORE")
     fake_run = MagicMock()
     monkeypatch.setattr(utils.subprocess, "run", fake_run)
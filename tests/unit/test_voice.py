@@ -5,78 +5,65 @@ import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock
 
-@pytest.fixture(autouse=True)
-def mock_dependencies():
-    sys.modules['langchain_community'] = MagicMock()
-    sys.modules['langchain_community.vectorstores'] = MagicMock()
-    sys.modules['langchain_community.embeddings'] = types.ModuleType("langchain_community.embeddings")
-    sys.modules['langchain_community.vectorstores.FAISS'] = MagicMock()
-    sys.modules['torch'] = MagicMock()
-    sys.modules['sentence_transformers'] = MagicMock()
-    sys.modules['sentence_transformers.SentenceTransformer'] = MagicMock()
-    huggingface_mod = types.ModuleType("langchain_huggingface")
-    huggingface_mod.HuggingFaceEmbeddings = MagicMock()
-    sys.modules['langchain_huggingface'] = huggingface_mod
-    sys.modules['faiss'] = MagicMock()
-    #sys.modules['numpy'] = MagicMock()
-
-    # Mock voice module dependencies
-    sys.modules['sounddevice'] = MagicMock()
-    sys.modules['whisper'] = MagicMock()
-    sys.modules['TTS'] = MagicMock()
-    sys.modules['TTS.api'] = MagicMock()
-    sys.modules['soundfile'] = MagicMock()
-    sys.modules['scipy'] = MagicMock()
-    sys.modules['scipy.io'] = MagicMock()
-    sys.modules['scipy.io.wavfile'] = MagicMock()
-    yield
+# conftest.py shims sounddevice, TTS and the other audio imports
+import engine.voice as voice
 
 # ---- UNIT TEST FOR speak_text ----
 
+def _patch_voice_io(monkeypatch, run=lambda *a, **k: None, remove=lambda f: None):
+    """Block playback, temp-file cleanup and random file names for speak_text.
+
+    Pass `run` / `remove` to record the ffplay call or the temp-file removal.
+    """
+    monkeypatch.setattr(voice.subprocess, "run", run)
+    monkeypatch.setattr(voice.os, "remove", remove)
+    monkeypatch.setattr(voice.os.path, "abspath", lambda f: "/tmp/" + f)
+    monkeypatch.setattr(voice.uuid, "uuid4", lambda: types.SimpleNamespace(hex="testhex"))
+
+class _FakeTTS:
+    """Plain stand-in for TTS: tts() replays results in order, raising exceptions."""
+    def __init__(self, *results):
+        self._results = list(results)
+        self.calls = []
+
+    def tts(self, text):
+        self.calls.append(text)
+        result = self._results.pop(0) if len(self._results) > 1 else self._results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
 def test_speak_text_runs_and_cleans_up(tmp_path, monkeypatch):
     import builtins
-    import engine.voice as voice
 
-    # Mock TTS object with .tts returning a numpy array
-    fake_tts_instance = MagicMock()
-    fake_wav = [0.0, 0.1, -0.1]  # Simulate a simple waveform
-    fake_tts_instance.tts.return_value = fake_wav
+    # Fake TTS object with .tts returning a simple waveform
+    fake_tts_instance = _FakeTTS([0.0, 0.1, -0.1])
 
     # Patch TTS constructor to return our fake instance
-    monkeypatch.setattr(voice, "TTS", MagicMock(return_value=fake_tts_instance))
+    monkeypatch.setattr(voice, "TTS", lambda *a, **k: fake_tts_instance)
 
     # Patch sf.write to avoid file IO
     fake_sf = MagicMock()
     monkeypatch.setattr(voice, "sf", fake_sf)
 
-    # Patch subprocess.run to simulate ffplay
-    monkeypatch.setattr(voice.subprocess, "run", MagicMock())
-
-    # Patch uuid to create a fixed filename (avoid randomness)
-    monkeypatch.setattr(voice.uuid, "uuid4", MagicMock(return_value=MagicMock(hex="testhex")))
-
-    # Patch os.remove to track file deletion
+    # Record ffplay and temp-file removal so the calls can be checked
+    played = []
     deleted_files = []
-    monkeypatch.setattr(voice.os, "remove", lambda f: deleted_files.append(f))
-
-    # Patch os.path.abspath to return a dummy path
-    monkeypatch.setattr(voice.os.path, "abspath", lambda f: "/tmp/" + f)
+    _patch_voice_io(monkeypatch, run=lambda *a, **k: played.append(a), remove=deleted_files.append)
 
     # Call the function
     voice.speak_text("Hello World!")
 
     # Check: TTS.tss was called
-    assert fake_tts_instance.tts.called
+    assert fake_tts_instance.calls
     # Check: file was "written"
     fake_sf.write.assert_called_once()
     # Check: subprocess.run was called to "play" the file
-    voice.subprocess.run.assert_called_once()
+    assert len(played) == 1
     # Check: file was "removed"
     assert deleted_files, "The temporary speech file should be cleaned up."
 
 def test_get_whisper_model(monkeypatch):
-    import engine.voice as voice
-
     mock_model = MagicMock()
     monkeypatch.setattr(voice, "get_whisper_model", MagicMock(return_value=mock_model))
     # Clear the cache between tests
@@ -88,29 +75,20 @@ def test_get_whisper_model(monkeypatch):
     assert voice.get_whisper_model() is mock_model
 
 def test_record_audio(monkeypatch):
-    import engine.voice as voice
-
     mock_rec = np.array([[1, 2], [3, 4]])
     monkeypatch.setattr(voice.sd, "rec", MagicMock(return_value=mock_rec))
     monkeypatch.setattr(voice.sd, "wait", MagicMock())
-    monkeypatch.setattr(voice.np, "squeeze", lambda arr: arr)
     res = voice.record_audio(1, 16000)
     assert (res == mock_rec).all()
 
 def test_estimate_noise_floor(monkeypatch):
-    import engine.voice as voice
-
     fake_audio = np.array([[10, 20], [30, 40]])
     monkeypatch.setattr(voice.sd, "rec", MagicMock(return_value=fake_audio))
     monkeypatch.setattr(voice.sd, "wait", MagicMock())
-    monkeypatch.setattr(voice.np, "abs", np.abs)
-    monkeypatch.setattr(voice.np, "mean", np.mean)
     result = voice.estimate_noise_floor()
     assert isinstance(result, (float, np.floating))
 
 def test_record_audio_until_silence_no_speech(monkeypatch):
-    import engine.voice as voice
-
     # Mock estimate_noise_floor to set a threshold
     monkeypatch.setattr(voice, "estimate_noise_floor", lambda *a, **k: 10)
     # Mock sd.InputStream to return None, triggers the fallback branch
@@ -122,8 +100,6 @@ def test_record_audio_until_silence_no_speech(monkeypatch):
     assert (audio == np.array([0], dtype=np.int16)).all()
 
 def test_save_temp_wav(monkeypatch):
-    import engine.voice as voice
-
     class DummyFile:
         name = "/tmp/test.wav"
         def __enter__(self): return self
@@ -131,8 +107,8 @@ def test_save_temp_wav(monkeypatch):
 
     monkeypatch.setattr(voice.tempfile, "NamedTemporaryFile", MagicMock(return_value=DummyFile()))
     fake_write = MagicMock()
-    # Patch the write function in your sys.modules mock!
-    sys.modules['scipy.io.wavfile'].write = fake_write
+    # save_temp_wav imports scipy.io.wavfile at call time
+    monkeypatch.setitem(sys.modules, 'scipy.io.wavfile', MagicMock(write=fake_write))
 
     audio = np.array([1, 2, 3])
     samplerate = 12345
@@ -142,8 +118,6 @@ def test_save_temp_wav(monkeypatch):
     fake_write.assert_called_once_with("/tmp/test.wav", samplerate, audio)
 
 def test_transcribe_audio(monkeypatch):
-    import engine.voice as voice
-
     monkeypatch.setattr(voice, "record_audio_until_silence", lambda *a, **k: np.array([1, 2, 3]))
     monkeypatch.setattr(voice, "save_temp_wav", lambda *a, **k: "/tmp/audio.wav")
     mock_model = MagicMock()
@@ -155,55 +129,35 @@ def test_transcribe_audio(monkeypatch):
     mock_model.transcribe.assert_called_with("/tmp/audio.wav")
 
 def test_speak_text_multiarray_fallback(monkeypatch):
-    import engine.voice as voice
-
-    fake_tts_instance = MagicMock()
     # First call to .tts raises an AttributeError with "multiarray" in the message
-    calls = [AttributeError("multiarray"), [0.0, 0.1, -0.1]]
-    def tts_side_effect(text):
-        v = calls.pop(0)
-        if isinstance(v, Exception):
-            raise v
-        return v
-    fake_tts_instance.tts.side_effect = tts_side_effect
-    monkeypatch.setattr(voice, "TTS", MagicMock(return_value=fake_tts_instance))
+    fake_tts_instance = _FakeTTS(AttributeError("multiarray"), [0.0, 0.1, -0.1])
+    monkeypatch.setattr(voice, "TTS", lambda *a, **k: fake_tts_instance)
     monkeypatch.setattr(voice, "sf", MagicMock())
-    monkeypatch.setattr(voice.subprocess, "run", MagicMock())
-    monkeypatch.setattr(voice.uuid, "uuid4", MagicMock(return_value=MagicMock(hex="testhex")))
-    monkeypatch.setattr(voice.os, "remove", MagicMock())
-    monkeypatch.setattr(voice.os.path, "abspath", lambda f: "/tmp/" + f)
+    _patch_voice_io(monkeypatch)
     # np._core.multiarray must exist, ensure it's there for patching
     import numpy as np
     if not hasattr(np._core, 'multiarray'):
         np._core.multiarray = MagicMock()
     voice._tts = None
     voice.speak_text("Hello Fallback!")
-    assert fake_tts_instance.tts.call_count == 2
+    assert len(fake_tts_instance.calls) == 2
 
 def test_speak_text_generator_and_flatten(monkeypatch):
-    import engine.voice as voice
-
     # Generator returns one nested array
     def fake_generator():
         yield [1, 2, 3]
-    fake_tts_instance = MagicMock()
-    fake_tts_instance.tts.return_value = fake_generator()
-    monkeypatch.setattr(voice, "TTS", MagicMock(return_value=fake_tts_instance))
+    fake_tts_instance = _FakeTTS(fake_generator())
+    monkeypatch.setattr(voice, "TTS", lambda *a, **k: fake_tts_instance)
     monkeypatch.setattr(voice, "sf", MagicMock())
-    monkeypatch.setattr(voice.subprocess, "run", MagicMock())
-    monkeypatch.setattr(voice.uuid, "uuid4", MagicMock(return_value=MagicMock(hex="testhex")))
-    monkeypatch.setattr(voice.os, "remove", MagicMock())
-    monkeypatch.setattr(voice.os.path, "abspath", lambda f: "/tmp/" + f)
+    _patch_voice_io(monkeypatch)
     import numpy as np
     voice._tts = None
     voice.speak_text("Hello Generator!")
     # It should run to completion with all conversions and flattening
-    assert fake_tts_instance.tts.called
+    assert fake_tts_instance.calls
 
 
 def test_transcribe_audio_file_not_found(monkeypatch):
-    import engine.voice as voice
-
     monkeypatch.setattr(voice, "record_audio_until_silence", lambda *a, **k: np.array([1, 2, 3]))
     monkeypatch.setattr(voice, "save_temp_wav", lambda *a, **k: "/tmp/audio.wav")
     mock_model = MagicMock()
@@ -216,15 +170,10 @@ def test_transcribe_audio_file_not_found(monkeypatch):
     assert text == "Test transcript"
 
 def test_speak_text_other_attribute_error(monkeypatch):
-    import engine.voice as voice
-    fake_tts_instance = MagicMock()
-    fake_tts_instance.tts.side_effect = AttributeError("unexpected error")
-    monkeypatch.setattr(voice, "TTS", MagicMock(return_value=fake_tts_instance))
+    fake_tts_instance = _FakeTTS(AttributeError("unexpected error"))
+    monkeypatch.setattr(voice, "TTS", lambda *a, **k: fake_tts_instance)
     monkeypatch.setattr(voice, "sf", MagicMock())
-    monkeypatch.setattr(voice.subprocess, "run", MagicMock())
-    monkeypatch.setattr(voice.uuid, "uuid4", MagicMock(return_value=MagicMock(hex="err")))
-    monkeypatch.setattr(voice.os, "remove", MagicMock())
-    monkeypatch.setattr(voice.os.path, "abspath", lambda f: "/tmp/" + f)
+    _patch_voice_io(monkeypatch)
     voice._tts = None
     try:
         voice.speak_text("error test")
@@ -232,7 +181,6 @@ def test_speak_text_other_attribute_error(monkeypatch):
         assert "unexpected error" in str(e)
 
 def test_record_audio_exception(monkeypatch):
-    import engine.voice as voice
     # sd.rec raises an exception
     monkeypatch.setattr(voice.sd, "rec", MagicMock(side_effect=RuntimeError("device error")))
     monkeypatch.setattr(voice.sd, "wait", MagicMock())
@@ -243,7 +191,6 @@ def test_record_audio_exception(monkeypatch):
         assert "device error" in str(e)
 
 def test_record_audio_until_silence_fallback(monkeypatch):
-    import engine.voice as voice
     import numpy as np
 
     with patch("engine.voice.estimate_noise_floor", side_effect=RuntimeError("fail!")):
@@ -252,7 +199,6 @@ def test_record_audio_until_silence_fallback(monkeypatch):
         assert (audio == np.array([1, 2, 3, 4])).all()
 
 def test_get_whisper_model_with_arg(monkeypatch):
-    import engine.voice as voice
     fake_model = MagicMock()
     monkeypatch.setattr(voice, "get_whisper_model", MagicMock(return_value=fake_model))
     # Clear the cache between tests
@@ -262,7 +208,6 @@ def test_get_whisper_model_with_arg(monkeypatch):
     assert model is fake_model
 
 def test_record_audio_until_silence_empty(monkeypatch):
-    import engine.voice as voice
     import numpy as np
 
     monkeypatch.setattr(voice, "estimate_noise_floor", lambda *a, **k: 1)
@@ -276,7 +221,6 @@ def test_record_audio_until_silence_empty(monkeypatch):
     assert isinstance(audio, np.ndarray)
 
 def test_transcribe_audio_transcribe_exception(monkeypatch):
-    import engine.voice as voice
     monkeypatch.setattr(voice, "record_audio_until_silence", lambda *a, **k: [1,2,3])
     monkeypatch.setattr(voice, "save_temp_wav", lambda *a, **k: "/tmp/audio.wav")
     mock_model = MagicMock()
@@ -1,5 +1,9 @@
+import json
+from types import SimpleNamespace
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
+import tools.weather as weather
 from tools.weather import action
 
 # Sample geocoding API response
@@ -42,56 +46,52 @@ WEATHER_ERROR_RESPONSE = {
     "error": "Invalid coordinates"
 }
 
+# Response bodies, serialized once at import
+_GEO_TEXT = json.dumps(GEOCODE_RESPONSE)
+_WEATHER_TEXT = json.dumps(WEATHER_RESPONSE)
+_GEO_EMPTY_TEXT = json.dumps(GEOCODE_ERROR_RESPONSE)
+_WEATHER_ERR_TEXT = json.dumps(WEATHER_ERROR_RESPONSE)
+
+class _FakeResponse:
+    """Minimal requests.Response stand-in: action() only calls .json()."""
+    def __init__(self, text):
+        self.text = text
+    def json(self):
+        return json.loads(self.text)
+
+# Canned responses shared by the fixtures below
+_GEOCODE_RESP = _FakeResponse(_GEO_TEXT)
+_WEATHER_RESP = _FakeResponse(_WEATHER_TEXT)
+_WEATHER_ERR_RESP = _FakeResponse(_WEATHER_ERR_TEXT)
+_EMPTY_GEO_RESP = _FakeResponse(_GEO_EMPTY_TEXT)
+
+@pytest.fixture(autouse=True)
+def _clear_weather_caches():
+    weather._GEOCODE_CACHE.clear()
+    weather._WEATHER_CACHE.clear()
+    yield
+
 @pytest.fixture
 def mock_get_success():
     """Mock successful API responses"""
     with patch('tools.weather.get') as mock_get:
-        # Create two different response objects for the two API calls
-        geocode_response = MagicMock()
-        geocode_response.text = '{"results": [{"name": "New York", "country": "United States", "latitude": 40.7128, "longitude": -74.0060}]}'
-
-        weather_response = MagicMock()
-        weather_response.text = '{"current": {"temperature_2m": 22.5, "relative_humidity_2m": 65, "apparent_temperature": 23.1, "precipitation": 0, "weather_code": 1, "wind_speed_10m": 10.5, "wind_direction_10m": 180}, "current_units": {"temperature_2m": "°C", "wind_speed_10m": "km/h", "precipitation": "mm"}}'
-
-        # Configure the mock to return different responses based on the URL
-        def side_effect(url, **kwargs):
-            if "geocoding-api" in url:
-                return geocode_response
-            else:
-                return weather_response
-
-        mock_get.side_effect = side_effect
+        # Return different responses based on the URL
+        mock_get.side_effect = lambda url, **kwargs: _GEOCODE_RESP if "geocoding-api" in url else _WEATHER_RESP
         yield mock_get
 
 @pytest.fixture
 def mock_get_location_not_found():
     """Mock API response for location not found"""
     with patch('tools.weather.get') as mock_get:
-        response = MagicMock()
-        response.text = '{"results": []}'
-        mock_get.return_value = response
+        mock_get.return_value = _EMPTY_GEO_RESP
         yield mock_get
 
 @pytest.fixture
 def mock_get_weather_error():
     """Mock API response for weather error"""
     with patch('tools.weather.get') as mock_get:
-        # First call returns geocoding success
-        geocode_response = MagicMock()
-        geocode_response.text = '{"results": [{"name": "New York", "country": "United States", "latitude": 40.7128, "longitude": -74.0060}]}'
-
-        # Second call returns weather error
-        weather_response = MagicMock()
-        weather_response.text = '{"error": "Invalid coordinates"}'
-
-        # Configure the mock to return different responses based on the call order
-        def side_effect(url, **kwargs):
-            if "geocoding-api" in url:
-                return geocode_response
-            else:
-                return weather_response
-
-        mock_get.side_effect = side_effect
+        # Geocoding succeeds, the weather call returns an error
+        mock_get.side_effect = lambda url, **kwargs: _GEOCODE_RESP if "geocoding-api" in url else _WEATHER_ERR_RESP
         yield mock_get
 
 def test_weather_success(mock_get_success):
@@ -106,12 +106,41 @@ def test_weather_success(mock_get_success):
     assert "Wind: 10.5km/h" in result
     assert "Mainly clear" in result  # Weather code 1
 
+def test_weather_repeat_query_is_cached(mock_get_success):
+    """Test that a repeated query reuses the cached geocoding and weather data"""
+    first = action("weather in New York", "New York")
+    second = action("weather in new york", " new york ")
+
+    assert first == second
+    assert mock_get_success.call_count == 2
+
+def test_weather_cache_expires(mock_get_success, monkeypatch):
+    """Test that cached weather data is refreshed after the TTL while geocoding stays cached"""
+    clock = [1000.0]
+    # Swap the module's time binding so only the cache sees the fake clock
+    monkeypatch.setattr(weather, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    action("weather in New York", "New York")
+    clock[0] += weather._WEATHER_TTL
+    action("weather in New York", "New York")
+
+    urls = [c.args[0] for c in mock_get_success.call_args_list]
+    assert sum("geocoding-api" in u for u in urls) == 1
+    assert sum("api.open-meteo.com/v1/forecast" in u for u in urls) == 2
+
 def test_weather_location_not_found(mock_get_location_not_found):
     """Test handling of location not found"""
     result = action("weather in NonexistentPlace", "NonexistentPlace")
     assert "couldn't find the location" in result
     assert "NonexistentPlace" in result
 
+def test_weather_location_not_found_is_not_cached(mock_get_location_not_found):
+    """Test that a failed geocoding lookup is retried on the next query"""
+    action("weather in NonexistentPlace", "NonexistentPlace")
+    action("weather in NonexistentPlace", "NonexistentPlace")
+
+    assert mock_get_location_not_found.call_count == 2
+    assert weather._GEOCODE_CACHE == {}
+
 def test_weather_api_error(mock_get_weather_error):
     """Test handling of weather API error"""
     result = action("weather in New York", "New York")
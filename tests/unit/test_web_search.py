@@ -1,17 +1,47 @@
+import contextlib
+from types import SimpleNamespace
+
 import pytest
 from unittest.mock import patch, MagicMock
 
-from tools.web_search import action, duckduckgo, bing, brave
+import tools.web_search as web_search
+from tools.web_search import action, action_race, duckduckgo, bing, brave
 
 class MockResponse:
     def __init__(self, text, status_code=200):
         self.text = text
         self.status_code = status_code
+        self.encoding = "utf-8"
+        # Raw body bytes, independent of whatever encoding the scraper picks
+        self.content = text.encode("utf-8")
+        self.chunks_read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        data = self.content
+        for start in range(0, len(data), chunk_size):
+            self.chunks_read += 1
+            yield data[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
 
     def raise_for_status(self):
         if self.status_code >= 400:
             raise Exception(f"HTTP Error: {self.status_code}")
 
+@contextlib.contextmanager
+def _patch_provider(engine, **kwargs):
+    """Swap a registered search provider for a MagicMock."""
+    mock = MagicMock(**kwargs)
+    with patch.dict(web_search._PROVIDERS, {engine: mock}):
+        yield mock
+
+@pytest.fixture(autouse=True)
+def _clear_search_cache():
+    web_search._CACHE.clear()
+    yield
+
 @pytest.fixture
 def mock_duckduckgo_html():
     return """
@@ -62,10 +92,81 @@ def test_duckduckgo_search(mock_duckduckgo_html):
         results = duckduckgo("test query")
 
         mock_get.assert_called_once()
-        assert len(results) == 4
+        # Collection stops after MAX_SNIPPETS matches
+        assert len(results) == 3
         assert results[0] == "First result snippet"
         assert results[1] == "Second result snippet"
 
+        # A larger limit returns every snippet on the page
+        assert len(duckduckgo("test query", limit=10)) == 4
+
+def test_search_stops_reading_after_limit():
+    # Many snippets streamed in small chunks: reading stops once enough are found
+    pytest.importorskip("lxml")
+    html = "<html><body>" + "".join(
+        f'<div class="result__snippet">Snippet {i}</div>' for i in range(2000)
+    ) + "</body></html>"
+    response = MockResponse(html)
+    with patch('tools.web_search.get', return_value=response) as mock_get:
+        results = duckduckgo("test query")
+
+        assert results == ["Snippet 0", "Snippet 1", "Snippet 2"]
+        assert mock_get.call_args.kwargs["stream"] is True
+        # The page spans many 8 KiB chunks but only the first one was read
+        assert len(html) > 10 * 8192
+        assert response.chunks_read == 1
+        assert response.closed
+
+def test_search_without_lxml_reads_whole_page(monkeypatch):
+    # Without lxml there is no pull parser, so the page is fetched in one read
+    monkeypatch.setattr(web_search, "etree", None)
+    html = "<html><body>" + "".join(
+        f'<div class="result__snippet">Snippet {i}</div>' for i in range(20)
+    ) + "</body></html>"
+    response = MockResponse(html)
+    with patch('tools.web_search.get', return_value=response) as mock_get:
+        results = duckduckgo("test query")
+
+        assert results == ["Snippet 0", "Snippet 1", "Snippet 2"]
+        assert "stream" not in mock_get.call_args.kwargs
+        assert response.chunks_read == 0
+
+def test_search_nested_markup_falls_back_to_parser():
+    # Highlighted terms inside a snippet are not cut off by the fast path
+    html = """
+    <html>
+        <a class="result__snippet" href="#">Learn <b>Python</b> &amp; more</a>
+        <a class="result__snippet" href="#">Plain snippet</a>
+    </html>
+    """
+    with patch('tools.web_search.get', return_value=MockResponse(html)):
+        results = duckduckgo("test query")
+
+        assert results == ["Learn Python & more", "Plain snippet"]
+
+def test_search_unexpected_class_markup_falls_back_to_parser():
+    # Single-quoted class attributes aren't seen by the fast path regex
+    html = "<html>" + "".join(f"<a class='result__snippet'>snip {i}</a>" for i in range(5)) + "</html>"
+    with patch('tools.web_search.get', return_value=MockResponse(html)):
+        assert duckduckgo("test query") == ["snip 0", "snip 1", "snip 2"]
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+def test_search_fast_path_across_chunk_boundaries(chunk_size):
+    # Snippets split across chunks are found once each, in page order
+    html = "<html>" + "".join(
+        f'<div class="result__snippet">Snippet {i}</div><p>filler</p>' for i in range(20)
+    ) + "</html>"
+    response = MockResponse(html)
+    iter_content = response.iter_content
+    response.iter_content = lambda chunk_size_=None, **kw: iter_content(chunk_size)
+    with patch('tools.web_search.get', return_value=response):
+        assert duckduckgo("test query", limit=10) == [f"Snippet {i}" for i in range(10)]
+
+def test_search_fast_path_unescapes_entities():
+    html = '<div class="result__snippet">Fish &amp; chips</div>'
+    with patch('tools.web_search.get', return_value=MockResponse(html)):
+        assert duckduckgo("test query") == ["Fish & chips"]
+
 def test_bing_search(mock_bing_html):
     with patch('tools.web_search.get') as mock_get:
         mock_get.return_value = MockResponse(mock_bing_html)
@@ -76,6 +177,12 @@ def test_bing_search(mock_bing_html):
         assert results[0] == "First result snippet"
         assert results[1] == "Second result snippet"
 
+def test_bing_search_without_lxml(mock_bing_html, monkeypatch):
+    # Bing has no fast-path regex, so the fallback selects with BeautifulSoup
+    monkeypatch.setattr(web_search, "etree", None)
+    with patch('tools.web_search.get', return_value=MockResponse(mock_bing_html)):
+        assert bing("test query", limit=2) == ["First result snippet", "Second result snippet"]
+
 def test_brave_search(mock_brave_html):
     with patch('tools.web_search.get') as mock_get:
         mock_get.return_value = MockResponse(mock_brave_html)
@@ -87,7 +194,7 @@ def test_brave_search(mock_brave_html):
         assert results[1] == "Second result snippet"
 
 def test_action_with_duckduckgo():
-    with patch('tools.web_search.duckduckgo') as mock_duckduckgo:
+    with _patch_provider('duckduckgo') as mock_duckduckgo:
         mock_duckduckgo.return_value = ["Result 1", "Result 2", "Result 3"]
         result = action("search for", "python programming", "duckduckgo")
 
@@ -98,7 +205,7 @@ def test_action_with_duckduckgo():
         assert "- Result 3" in result
 
 def test_action_with_bing():
-    with patch('tools.web_search.bing') as mock_bing:
+    with _patch_provider('bing') as mock_bing:
         mock_bing.return_value = ["Result 1", "Result 2"]
         result = action("search for", "python programming", "bing")
 
@@ -108,7 +215,7 @@ def test_action_with_bing():
         assert "- Result 2" in result
 
 def test_action_with_brave():
-    with patch('tools.web_search.brave') as mock_brave:
+    with _patch_provider('brave') as mock_brave:
         mock_brave.return_value = ["Result 1", "Result 2", "Result 3", "Result 4"]
         result = action("search for", "python programming", "brave")
 
@@ -121,7 +228,7 @@ def test_action_with_brave():
         assert "- Result 4" not in result
 
 def test_action_with_default_engine():
-    with patch('tools.web_search.duckduckgo') as mock_duckduckgo:
+    with _patch_provider('duckduckgo') as mock_duckduckgo:
         mock_duckduckgo.return_value = ["Result 1", "Result 2"]
         # No engine specified, should default to duckduckgo
         result = action("search for", "python programming")
@@ -129,8 +236,17 @@ def test_action_with_default_engine():
         mock_duckduckgo.assert_called_once_with("python programming")
         assert "Here's what I found about 'python programming'" in result
 
+def test_action_with_unmatched_engine_group():
+    with _patch_provider('duckduckgo') as mock_duckduckgo:
+        mock_duckduckgo.return_value = ["Result 1"]
+        # The optional engine group comes through as None when it didn't match
+        result = action("search for python tips", "python tips", engine=None)
+
+        mock_duckduckgo.assert_called_once_with("python tips")
+        assert "Here's what I found about 'python tips'" in result
+
 def test_action_with_unknown_engine():
-    with patch('tools.web_search.duckduckgo') as mock_duckduckgo:
+    with _patch_provider('duckduckgo') as mock_duckduckgo:
         mock_duckduckgo.return_value = ["Result 1", "Result 2"]
         # Unknown engine, should default to duckduckgo
         result = action("search for", "python programming", "unknown")
@@ -143,7 +259,7 @@ def test_action_with_empty_query():
     assert "I need something to search for." in result
 
 def test_action_with_no_results():
-    with patch('tools.web_search.duckduckgo') as mock_duckduckgo:
+    with _patch_provider('duckduckgo') as mock_duckduckgo:
         mock_duckduckgo.return_value = []
         result = action("search for", "python programming")
 
@@ -151,9 +267,78 @@ def test_action_with_no_results():
         assert "I searched, but couldn't find anything useful" in result
 
 def test_action_with_exception():
-    with patch('tools.web_search.duckduckgo') as mock_duckduckgo:
+    with _patch_provider('duckduckgo') as mock_duckduckgo:
         mock_duckduckgo.side_effect = Exception("Connection error")
         result = action("search for", "python programming")
 
         mock_duckduckgo.assert_called_once_with("python programming")
         assert "Web search failed: Connection error" in result
+
+def test_action_race_returns_first_non_empty():
+    with _patch_provider('duckduckgo', return_value=[]), \
+         _patch_provider('bing', side_effect=Exception("Throttled")), \
+         _patch_provider('brave', return_value=["Brave 1", "Brave 2"]):
+        result = action_race("search for", "python programming")
+
+        assert "Here's what I found about 'python programming'" in result
+        assert "- Brave 1" in result
+
+def test_action_race_all_engines_fail():
+    with _patch_provider('duckduckgo', side_effect=Exception("Connection error")), \
+         _patch_provider('bing', side_effect=Exception("Connection error")), \
+         _patch_provider('brave', side_effect=Exception("Connection error")):
+        result = action_race("search for", "python programming")
+
+        assert "Web search failed: Connection error" in result
+
+def test_action_race_no_results():
+    with _patch_provider('duckduckgo', return_value=[]), \
+         _patch_provider('bing', return_value=[]), \
+         _patch_provider('brave', return_value=[]):
+        result = action_race("search for", "python programming")
+
+        assert "I searched, but couldn't find anything useful" in result
+
+def test_action_caches_repeated_queries():
+    with _patch_provider('duckduckgo') as mock_duckduckgo:
+        mock_duckduckgo.return_value = ["Result 1"]
+        first = action("search for", "python programming")
+        # Same query with different case/whitespace is served from the cache
+        second = action("search for", "  Python Programming ")
+
+        mock_duckduckgo.assert_called_once_with("python programming")
+        assert first == second
+
+def test_action_cache_expires(monkeypatch):
+    clock = [1000.0]
+    # Swap the module's time binding so only the cache sees the fake clock
+    monkeypatch.setattr(web_search, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    with _patch_provider('duckduckgo') as mock_duckduckgo:
+        mock_duckduckgo.return_value = []
+        action("search for", "python programming")
+        # Empty results are only cached briefly
+        clock[0] += web_search._CACHE_MISS_TTL
+        action("search for", "python programming")
+
+        assert mock_duckduckgo.call_count == 2
+
+def test_action_with_registered_provider():
+    custom = MagicMock(return_value=["Custom 1"])
+    with patch.dict(web_search._PROVIDERS, {"custom": custom}):
+        result = action("search for", "python programming", "Custom")
+
+        custom.assert_called_once_with("python programming")
+        assert "- Custom 1" in result
+
+@pytest.mark.parametrize("use_lxml", [True, False])
+def test_search_decodes_as_utf8_without_detection(use_lxml, monkeypatch):
+    # No charset from the server: the scraper must not fall back to guessing
+    if use_lxml:
+        pytest.importorskip("lxml")
+    else:
+        monkeypatch.setattr(web_search, "etree", None)
+    response = MockResponse('<div class="result__snippet">São Paulo</div>')
+    response.encoding = None
+    with patch('tools.web_search.get', return_value=response):
+        assert duckduckgo("test query") == ["São Paulo"]
+        assert response.encoding == "utf-8"
@@ -1,14 +1,31 @@
 from datetime import datetime
+import os
 from pathlib import Path
 
 name = "add_note"
 description = "Add a personal note or reminder"
 pattern = r"\b(remind|note|remember|todo)\b.*(?P<content>.+)"
 
+_NOTES_DIR = Path("knowledge/notes")
+_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+
+def _open_notes(path: Path) -> int:
+    try:
+        return os.open(path, _FLAGS, 0o644)
+    except FileNotFoundError:
+        # Create the notes directory on first use, or if it was removed
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return os.open(path, _FLAGS, 0o644)
+
 def action(user_input: str, content: str) -> str:
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-    notes_path = Path("knowledge/notes") / f"{datetime.now().date()}.md"
-    notes_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(notes_path, "a", encoding="utf-8") as f:
-        f.write(f"- {timestamp} {content.strip()}\n")
-    return f"Got it. I noted: “{content.strip()}”."
+    now = datetime.now()
+    timestamp = now.strftime("%Y-%m-%d %H:%M")
+    notes_path = _NOTES_DIR / f"{now.date()}.md"
+    note = content.strip()
+    # One O_APPEND write per note, so concurrent notes don't interleave
+    fd = _open_notes(notes_path)
+    try:
+        os.write(fd, f"- {timestamp} {note}\n".encode("utf-8"))
+    finally:
+        os.close(fd)
+    return f"Got it. I noted: “{note}”."
@@ -1,4 +1,4 @@
-from ast import literal_eval
+import ast
 import re
 import math
 import operator as op
@@ -7,17 +7,6 @@ name = "calculator"
 description = "Performs basic math calculations"
 pattern = r"(?:calculate|compute|what is|solve)\s+(?P<expression>.+)"
 
-# Define safe operations
-operators = {
-    '+': op.add,
-    '-': op.sub,
-    '*': op.mul,
-    '/': op.truediv,
-    '**': op.pow,
-    '%': op.mod,
-    '//': op.floordiv
-}
-
 # Define safe functions
 safe_functions = {
     'abs': abs,
@@ -36,39 +25,60 @@ safe_functions = {
     'e': math.e
 }
 
-def safe_eval(expr):
-    """Safely evaluate a mathematical expression"""
-    # Replace function names with their values from safe_functions
-    for func_name, func_value in safe_functions.items():
-        if callable(func_value):
-            # For callable functions, don't replace yet
-            continue
-        # For constants like pi and e, replace with their values
-        expr = expr.replace(func_name, str(func_value))
+# Integer powers past this many result bits are refused, so 9**9**9 can't hang
+_MAX_POW_BITS = 4096
+
+def _pow(base, exp):
+    if (isinstance(base, int) and isinstance(exp, int) and exp > 0 and abs(base) > 1
+            and base.bit_length() * exp > _MAX_POW_BITS):
+        raise ValueError(f"Exponent too large: {base}**{exp}")
+    return op.pow(base, exp)
 
-    # Handle functions like sin, cos, etc.
-    for func_name, func in safe_functions.items():
-        if not callable(func):
-            continue
-        # Find all instances of function calls like sin(...)
-        pattern = r'\b' + func_name + r'\s*\(([^)]+)\)'
-        matches = re.finditer(pattern, expr)
-        for match in reversed(list(matches)):
-            # Evaluate the inner expression first
-            inner_expr = match.group(1)
-            try:
-                inner_result = safe_eval(inner_expr)
-                # Replace the function call with its result
-                result = func(inner_result)
-                expr = expr[:match.start()] + str(result) + expr[match.end():]
-            except Exception:
-                # If evaluation fails, leave it as is
-                continue
+# Define safe operations, keyed by AST node type
+_BIN_OPS = {
+    ast.Add: op.add,
+    ast.Sub: op.sub,
+    ast.Mult: op.mul,
+    ast.Div: op.truediv,
+    ast.Pow: _pow,
+    ast.Mod: op.mod,
+    ast.FloorDiv: op.floordiv
+}
+_UNARY_OPS = {
+    ast.USub: op.neg,
+    ast.UAdd: op.pos
+}
+_CLEAN_RE = re.compile(r'equals|equal to|is')
+
+def _eval(node):
+    """Evaluate a single AST node, allowing only numbers, operators and safe_functions"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        return _BIN_OPS[type(node.op)](_eval(node.left), _eval(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_eval(node.operand))
+    if isinstance(node, (ast.Tuple, ast.List)):
+        return tuple(_eval(elt) for elt in node.elts)
+    if isinstance(node, ast.Name) and node.id in safe_functions:
+        value = safe_functions[node.id]
+        if not callable(value):
+            # Constants like pi and e
+            return value
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and callable(safe_functions.get(node.func.id)) and not node.keywords):
+        func = safe_functions[node.func.id]
+        args = [_eval(arg) for arg in node.args]
+        if func is sum and len(args) > 1:
+            # sum(1, 2, 3) adds its arguments rather than using a start value
+            return sum(args)
+        return func(*args)
+    raise ValueError(f"Unsupported expression: {ast.dump(node)}")
 
-    # Use a safer approach for basic arithmetic
+def safe_eval(expr):
+    """Safely evaluate a mathematical expression"""
     try:
-        # This will handle basic arithmetic operations
-        return eval(expr, {"__builtins__": {}}, operators)
+        return _eval(ast.parse(expr, mode='eval').body)
     except Exception as e:
         raise ValueError(f"Could not evaluate expression: {expr}. Error: {e}")
 
@@ -77,7 +87,7 @@ def action(user_input: str, expression: str) -> str:
         # Clean up the expression
         expression = expression.strip()
         # Remove common words and characters that might interfere
-        expression = re.sub(r'equals|equal to|is', '', expression)
+        expression = _CLEAN_RE.sub('', expression)
         expression = expression.strip()
 
         # Evaluate the expression
@@ -3,5 +3,13 @@ description = "Tells the current date"
 pattern = r"\bwhat('?s| is)?\b.*\bdate\b"
 from datetime import datetime
 
+# (day ordinal, answer) of the last call; the answer only changes once a day
+_LAST = (None, "")
+
 def action(user_input: str = None):
-    return f"Today is: {datetime.now().strftime('%Y-%m-%d')}"
+    global _LAST
+    now = datetime.now()
+    day = now.toordinal()
+    if day != _LAST[0]:
+        _LAST = (day, f"Today is: {now.strftime('%Y-%m-%d')}")
+    return _LAST[1]
@@ -3,5 +3,13 @@ description = "Tells the current time"
 pattern = r"\bwhat('?s| is)?\b.*\btime\b"
 from datetime import datetime
 
+# (epoch second, answer) of the last call; the answer only changes once a second
+_LAST = (None, "")
+
 def action(user_input: str = None):
-    return f"Current time: {datetime.now().strftime('%H:%M:%S')}"
+    global _LAST
+    now = datetime.now()
+    second = int(now.timestamp())
+    if second != _LAST[0]:
+        _LAST = (second, f"Current time: {now.strftime('%H:%M:%S')}")
+    return _LAST[1]
@@ -1,16 +1,24 @@
+import heapq
+import os
 from pathlib import Path
 
 name = "list_notes"
 description = "Lists all stored notes by date"
 pattern = r"\b(list|show|recall)\b.*\bnotes?\b"
 
+_NOTES_DIR = Path("knowledge/notes")
+
 def action() -> str:
-    notes_dir = Path("knowledge/notes")
-    files = sorted(notes_dir.glob("*.md"))
-    if not files:
+    # Note files are named by date, so the largest names are the latest notes
+    try:
+        with os.scandir(_NOTES_DIR) as it:
+            latest = heapq.nlargest(5, (e.name for e in it if e.name.endswith(".md") and e.is_file()))
+    except FileNotFoundError:
+        latest = []
+    if not latest:
         return "📭 No notes found."
 
     out = ["🗒️ Your notes:"]
-    for f in files[-5:]:  # show only latest 5 files
-        out.append(f"- {f.name}")
+    for name in reversed(latest):  # show only latest 5 files, oldest first
+        out.append(f"- {name}")
     return "\n".join(out)
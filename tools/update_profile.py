@@ -1,4 +1,5 @@
 import json
+import os
 from pathlib import Path
 
 PROFILE_PATH = Path("profile.json")
@@ -19,7 +20,10 @@ def action(key: str, value: str) -> str:
 
     profile.setdefault("preferences", {})[key] = value
 
-    with open(PROFILE_PATH, "w", encoding="utf-8") as f:
+    # Write a sibling temp file and swap it in, so a crash can't truncate the profile
+    tmp_path = PROFILE_PATH.with_name(PROFILE_PATH.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(profile, f, indent=2)
+    os.replace(tmp_path, PROFILE_PATH)
 
     return f"Preference '{key}' updated to '{value}'."
@@ -1,11 +1,88 @@
-import json
-from urllib.parse import quote_plus
-from engine.net import get
+import time
+from engine.net import get, quote_query
 
 name = "weather"
 description = "Gets current weather information for a location"
 pattern = r"(?:what(?:'s| is) the )?weather(?: in| for)?\s+(?P<location>[A-Za-z0-9 ,\-]+)[\?\. ]*$"
 
+# Map weather codes to descriptions
+_WEATHER_DESCRIPTIONS = {
+    0: "Clear sky",
+    1: "Mainly clear",
+    2: "Partly cloudy",
+    3: "Overcast",
+    45: "Fog",
+    48: "Depositing rime fog",
+    51: "Light drizzle",
+    53: "Moderate drizzle",
+    55: "Dense drizzle",
+    56: "Light freezing drizzle",
+    57: "Dense freezing drizzle",
+    61: "Slight rain",
+    63: "Moderate rain",
+    65: "Heavy rain",
+    66: "Light freezing rain",
+    67: "Heavy freezing rain",
+    71: "Slight snow fall",
+    73: "Moderate snow fall",
+    75: "Heavy snow fall",
+    77: "Snow grains",
+    80: "Slight rain showers",
+    81: "Moderate rain showers",
+    82: "Violent rain showers",
+    85: "Slight snow showers",
+    86: "Heavy snow showers",
+    95: "Thunderstorm",
+    96: "Thunderstorm with slight hail",
+    99: "Thunderstorm with heavy hail"
+}
+
+# Current weather by rounded (lat, lon), so nearby places share an entry
+_WEATHER_CACHE: dict[tuple[float, float], tuple[float, dict]] = {}
+_WEATHER_CACHE_MAXSIZE = 256
+_WEATHER_TTL = 600
+
+# Geocoding matches by normalized location name
+_GEOCODE_CACHE: dict[str, dict] = {}
+_GEOCODE_CACHE_MAXSIZE = 1024
+
+def _geocode(location_key: str):
+    """Return the first geocoding match for a normalized location name, or None.
+
+    Coordinates don't change, so matches are kept for the life of the process.
+    Misses aren't cached, so a failed or empty lookup is retried next time.
+    """
+    result = _GEOCODE_CACHE.get(location_key)
+    if result is not None:
+        return result
+
+    geocode_url = f"https://geocoding-api.open-meteo.com/v1/search?name={quote_query(location_key)}&count=1&language=en&format=json"
+    results = get(geocode_url, timeout=10).json().get("results")
+    if not results:
+        return None
+    if len(_GEOCODE_CACHE) >= _GEOCODE_CACHE_MAXSIZE:
+        # Drop the oldest entry
+        del _GEOCODE_CACHE[next(iter(_GEOCODE_CACHE))]
+    _GEOCODE_CACHE[location_key] = results[0]
+    return results[0]
+
+def _current_weather(lat: float, lon: float) -> dict:
+    key = (round(lat, 2), round(lon, 2))
+    now = time.monotonic()
+    entry = _WEATHER_CACHE.get(key)
+    if entry is not None and now < entry[0]:
+        return entry[1]
+
+    weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,apparent_temperature,precipitation,weather_code,wind_speed_10m,wind_direction_10m&timezone=auto"
+    weather_data = get(weather_url, timeout=10).json()
+    if "current" in weather_data:
+        _WEATHER_CACHE.pop(key, None)
+        if len(_WEATHER_CACHE) >= _WEATHER_CACHE_MAXSIZE:
+            # Drop the oldest entry
+            del _WEATHER_CACHE[next(iter(_WEATHER_CACHE))]
+        _WEATHER_CACHE[key] = (now + _WEATHER_TTL, weather_data)
+    return weather_data
+
 def action(user_input: str, location: str) -> str:
     """Get current weather information for a location using OpenWeatherMap API"""
     try:
@@ -14,80 +91,47 @@ def action(user_input: str, location: str) -> str:
 
         # Use OpenMeteo API which doesn't require an API key
         # First, get geocoding information
-        geocode_url = f"https://geocoding-api.open-meteo.com/v1/search?name={quote_plus(location)}&count=1&language=en&format=json"
-        geocode_response = get(geocode_url, timeout=10)
-        geocode_data = json.loads(geocode_response.text)
+        result = _geocode(location.lower())
 
-        if not geocode_data.get("results"):
+        if result is None:
             return f"Sorry, I couldn't find the location '{location}'. Please try a different location."
 
         # Extract location data
-        result = geocode_data["results"][0]
         lat = result["latitude"]
         lon = result["longitude"]
         full_location = f"{result.get('name', '')}, {result.get('country', '')}"
 
         # Get weather data
-        weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,apparent_temperature,precipitation,weather_code,wind_speed_10m,wind_direction_10m&timezone=auto"
-        weather_response = get(weather_url, timeout=10)
-        weather_data = json.loads(weather_response.text)
+        weather_data = _current_weather(lat, lon)
 
         if "current" not in weather_data:
             return f"Sorry, I couldn't get weather data for '{location}'."
 
         current = weather_data["current"]
 
-        # Map weather codes to descriptions
-        weather_descriptions = {
-            0: "Clear sky",
-            1: "Mainly clear",
-            2: "Partly cloudy",
-            3: "Overcast",
-            45: "Fog",
-            48: "Depositing rime fog",
-            51: "Light drizzle",
-            53: "Moderate drizzle",
-            55: "Dense drizzle",
-            56: "Light freezing drizzle",
-            57: "Dense freezing drizzle",
-            61: "Slight rain",
-            63: "Moderate rain",
-            65: "Heavy rain",
-            66: "Light freezing rain",
-            67: "Heavy freezing rain",
-            71: "Slight snow fall",
-            73: "Moderate snow fall",
-            75: "Heavy snow fall",
-            77: "Snow grains",
-            80: "Slight rain showers",
-            81: "Moderate rain showers",
-            82: "Violent rain showers",
-            85: "Slight snow showers",
-            86: "Heavy snow showers",
-            95: "Thunderstorm",
-            96: "Thunderstorm with slight hail",
-            99: "Thunderstorm with heavy hail"
-        }
-
         weather_code = current.get("weather_code", 0)
-        weather_description = weather_descriptions.get(weather_code, "Unknown")
+        weather_description = _WEATHER_DESCRIPTIONS.get(weather_code, "Unknown")
 
         # Format the response
-        temp_unit = weather_data.get("current_units", {}).get("temperature_2m", "°C")
-        wind_unit = weather_data.get("current_units", {}).get("wind_speed_10m", "km/h")
+        units = weather_data.get("current_units", {})
+        temp_unit = units.get("temperature_2m", "°C")
+        wind_unit = units.get("wind_speed_10m", "km/h")
 
-        response = f"Weather for {full_location}:\n"
-        response += f"• Condition: {weather_description}\n"
-        response += f"• Temperature: {current.get('temperature_2m', 'N/A')}{temp_unit}\n"
-        response += f"• Feels like: {current.get('apparent_temperature', 'N/A')}{temp_unit}\n"
-        response += f"• Humidity: {current.get('relative_humidity_2m', 'N/A')}%\n"
-        response += f"• Wind: {current.get('wind_speed_10m', 'N/A')}{wind_unit}"
+        lines = [
+            f"Weather for {full_location}:",
+            f"• Condition: {weather_description}",
+            f"• Temperature: {current.get('temperature_2m', 'N/A')}{temp_unit}",
+            f"• Feels like: {current.get('apparent_temperature', 'N/A')}{temp_unit}",
+            f"• Humidity: {current.get('relative_humidity_2m', 'N/A')}%",
+            f"• Wind: {current.get('wind_speed_10m', 'N/A')}{wind_unit}",
+        ]
 
-        if current.get('precipitation', 0) > 0:
-            precip_unit = weather_data.get("current_units", {}).get("precipitation", "mm")
-            response += f"\n• Precipitation: {current.get('precipitation')}{precip_unit}"
+        precipitation = current.get('precipitation', 0)
+        if precipitation > 0:
+            precip_unit = units.get("precipitation", "mm")
+            lines.append(f"• Precipitation: {precipitation}{precip_unit}")
 
-        return response
+        return "\n".join(lines)
 
     except Exception as e:
         return f"Sorry, I couldn't get weather information. Error: {str(e)}"
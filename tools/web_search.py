@@ -1,55 +1,235 @@
 from bs4 import BeautifulSoup
-from urllib.parse import quote_plus
-from engine.net import get
+try:
+    from lxml import etree
+except ImportError:
+    # Fall back to reading the whole page and parsing it with html.parser
+    etree = None
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+from html import unescape
+from itertools import islice
+import re
+import time
+from engine.net import get, quote_query
 
 name = "web_search"
 description = "Searches the web using DuckDuckGo, Bing, or Brave and returns top snippets."
 pattern = r"(?:search|google|look up|find|can you search(?: for me)?)(?: with (?P<engine>duckduckgo|bing|brave))?(?: about| for)?\s+(?P<query>[A-Za-z0-9 '\-]+)[\?\. ]*$"
 
+# Only the first few snippets are shown, so scrapers stop collecting after these
+MAX_SNIPPETS = 3
+
+# Recent answers keyed by (engine, normalized query); misses expire sooner
+_CACHE: "OrderedDict[tuple[str, str], tuple[float, str]]" = OrderedDict()
+_CACHE_MAXSIZE = 256
+_CACHE_TTL = 600
+_CACHE_MISS_TTL = 60
+
+# Byte-level fast path for snippets that are a single class on flat markup. The
+# character after "<" tells a closing tag ("/") from nested markup like <b>.
+_DDG_RE = re.compile(rb'class="(?:[^"]* )?result__snippet(?: [^"]*)?"[^>]*>([^<]*)<(.)', re.DOTALL)
+_BRAVE_RE = re.compile(rb'class="(?:[^"]* )?snippet-description(?: [^"]*)?"[^>]*>([^<]*)<(.)', re.DOTALL)
+
+# All engines serve UTF-8, so requests' charset detection is never needed
+_ENCODING = "utf-8"
+
 headers = {
     "User-Agent": "Mozilla/5.0 (compatible; Suhana/1.0; +https://github.com/reterics/suhana)"
 }
 
-def duckduckgo(query: str) -> list[str]:
-    url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
-    res = get(url, timeout=10, headers=headers)
-    soup = BeautifulSoup(res.text, "html.parser")
-    results = soup.select(".result__snippet")
-    return [r.text.strip() for r in results if r.text.strip()]
-
-def bing(query: str) -> list[str]:
-    url = f"https://www.bing.com/search?q={quote_plus(query)}"
-    res = get(url, timeout=10, headers=headers)
-    soup = BeautifulSoup(res.text, "html.parser")
-    results = soup.select("li.b_algo h2 + p")  # or ".b_caption p"
-    return [r.text.strip() for r in results if r.text.strip()]
-
-def brave(query: str) -> list[str]:
-    url = f"https://search.brave.com/search?q={quote_plus(query)}"
-    res = get(url, timeout=10, headers=headers)
-    soup = BeautifulSoup(res.text, "html.parser")
-    results = soup.select(".snippet-description")
-    return [r.text.strip() for r in results if r.text.strip()]
+def _select_text(html: str, selector: str, limit: int = MAX_SNIPPETS) -> list[str]:
+    """Return the stripped text of the first `limit` non-empty nodes matching a CSS selector.
+
+    Only used when lxml is unavailable.
+    """
+    # iselect walks the tree lazily, so we stop as soon as we have enough
+    texts = (node.text.strip() for node in BeautifulSoup(html, "html.parser").css.iselect(selector))
+    return list(islice((t for t in texts if t), limit))
+
+def _fast_snippets(data: bytes, fast, limit: int, encoding: str, pos: int = 0):
+    """Regex-extract flat snippets from data[pos:].
+
+    Returns (snippets, resume_pos), or None once a snippet holds nested markup.
+    resume_pos is where a later scan of the same, grown buffer should start: the
+    end of the last match, or the second-to-last "<" after it, since a match that
+    was cut off by the end of the data starts inside the last opening tag.
+    """
+    results = []
+    for m in fast.finditer(data, pos):
+        if m.group(2) != b"/":
+            return None
+        pos = m.end()
+        text = unescape(m.group(1).decode(encoding, "replace")).strip()
+        if text:
+            results.append(text)
+            if len(results) >= limit:
+                break
+    last = data.rfind(b"<", pos)
+    if last != -1:
+        pos = max(pos, data.rfind(b"<", pos, last))
+    return results, pos
+
+def _stream_text(res, match, limit: int = MAX_SNIPPETS, fast=None) -> list[str]:
+    """Pull-parse a streamed response, stopping the download once `limit` elements matched.
+
+    With a `fast` regex the bytes are scanned without building a tree. The parser
+    takes over when a snippet with nested markup shows up, or when the page ends
+    with fewer than `limit` regex matches (e.g. markup the regex doesn't expect).
+    """
+    encoding = getattr(res, "encoding", None) or _ENCODING
+    parser = etree.HTMLPullParser(events=("end",), encoding=encoding)
+    results = []
+    buffer = bytearray() if fast is not None else None
+    fast_results, scan_pos = [], 0
+
+    def collect():
+        for _, el in parser.read_events():
+            if match(el):
+                text = "".join(el.itertext()).strip()
+                if text:
+                    results.append(text)
+                    if len(results) >= limit:
+                        return True
+        return False
+
+    try:
+        for chunk in res.iter_content(chunk_size=8192):
+            if buffer is not None:
+                buffer += chunk
+                scanned = _fast_snippets(buffer, fast, limit - len(fast_results), encoding, scan_pos)
+                if scanned is not None:
+                    snippets, scan_pos = scanned
+                    fast_results += snippets
+                    if len(fast_results) >= limit:
+                        return fast_results
+                    continue
+                # Nested markup: hand everything read so far to the parser
+                chunk, buffer = bytes(buffer), None
+            parser.feed(chunk)
+            if collect():
+                return results
+        if buffer is not None:
+            # The fast scan came up short; let the parser read the whole page
+            parser.feed(bytes(buffer))
+        parser.close()
+        collect()
+        return results
+    finally:
+        res.close()
+
+def _has_class(el, cls: str) -> bool:
+    return cls in (el.get("class") or "").split()
+
+def _is_bing_snippet(el) -> bool:
+    # li.b_algo h2 + p
+    prev = el.getprevious()
+    return (el.tag == "p" and prev is not None and prev.tag == "h2"
+            and any(a.tag == "li" and _has_class(a, "b_algo") for a in el.iterancestors()))
+
+def _scrape(url: str, selector: str, match, limit: int, fast=None) -> list[str]:
+    if etree is None:
+        res = get(url, timeout=10, headers=headers)
+        res.encoding = _ENCODING
+        html = res.content.decode(_ENCODING, errors="replace")
+        if fast is not None:
+            scanned = _fast_snippets(res.content, fast, limit, _ENCODING)
+            if scanned is not None and len(scanned[0]) >= limit:
+                return scanned[0]
+        return _select_text(html, selector, limit)
+    res = get(url, timeout=10, headers=headers, stream=True)
+    res.encoding = _ENCODING
+    return _stream_text(res, match, limit, fast)
+
+def duckduckgo(query: str, limit: int = MAX_SNIPPETS) -> list[str]:
+    url = f"https://html.duckduckgo.com/html/?q={quote_query(query)}"
+    return _scrape(url, ".result__snippet", lambda el: _has_class(el, "result__snippet"), limit, _DDG_RE)
+
+def bing(query: str, limit: int = MAX_SNIPPETS) -> list[str]:
+    url = f"https://www.bing.com/search?q={quote_query(query)}"
+    return _scrape(url, "li.b_algo h2 + p", _is_bing_snippet, limit)  # or ".b_caption p"
+
+def brave(query: str, limit: int = MAX_SNIPPETS) -> list[str]:
+    url = f"https://search.brave.com/search?q={quote_query(query)}"
+    return _scrape(url, ".snippet-description", lambda el: _has_class(el, "snippet-description"), limit, _BRAVE_RE)
+
+# Engine name -> scraper; other modules may register more providers here
+_PROVIDERS = {
+    "duckduckgo": duckduckgo,
+    "bing": bing,
+    "brave": brave,
+}
+
+def _cache_get(key: tuple[str, str]):
+    entry = _CACHE.get(key)
+    if entry is None:
+        return None
+    expires, response = entry
+    if time.monotonic() >= expires:
+        del _CACHE[key]
+        return None
+    _CACHE.move_to_end(key)
+    return response
+
+def _cache_put(key: tuple[str, str], response: str, ttl: float) -> None:
+    _CACHE[key] = (time.monotonic() + ttl, response)
+    _CACHE.move_to_end(key)
+    while len(_CACHE) > _CACHE_MAXSIZE:
+        _CACHE.popitem(last=False)
+
+def _summarize(query: str, snippets: list[str]) -> str:
+    if not snippets:
+        return "I searched, but couldn't find anything useful"
+
+    summary = "\n".join(f"- {s}" for s in snippets[:MAX_SNIPPETS])
+    message = f"Here's what I found about '{query}'"
+    return message + f":\n{summary}"
 
 def action(user_input: str, query: str, engine: str = "duckduckgo") -> str:
     if not query.strip():
         return "I need something to search for."
 
+    # The engine group is optional in `pattern`, so dispatch may pass None
+    engine = (engine or "duckduckgo").lower()
+    if engine not in _PROVIDERS:
+        engine = "duckduckgo"
+    key = (engine, query.strip().lower())
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
     try:
-        provider = {
-            "duckduckgo": duckduckgo,
-            "bing": bing,
-            "brave": brave,
-        }.get(engine.lower(), duckduckgo)
+        snippets = _PROVIDERS[engine](query)
+        response = _summarize(query, snippets)
+        _cache_put(key, response, _CACHE_TTL if snippets else _CACHE_MISS_TTL)
+        return response
 
-        snippets = provider(query)
+    except Exception as e:
+        return f"Web search failed: {e}"
 
-        if not snippets:
-            return "I searched, but couldn't find anything useful"
+def action_race(user_input: str, query: str) -> str:
+    """Query every engine concurrently and answer with the first non-empty result."""
+    if not query.strip():
+        return "I need something to search for."
+
+    executor = ThreadPoolExecutor(max_workers=3)
+    try:
+        futures = [executor.submit(fn, query) for fn in _PROVIDERS.values()]
+        errors = []
+        for future in as_completed(futures, timeout=10):
+            try:
+                snippets = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            if snippets:
+                return _summarize(query, snippets)
 
-        summary = "\n".join(f"- {s}" for s in snippets[:3])
-        message = f"Here's what I found about '{query}'"
-        return message + f":\n{summary}"
+        if len(errors) == len(futures):
+            return f"Web search failed: {errors[0]}"
+        return _summarize(query, [])
 
     except Exception as e:
         return f"Web search failed: {e}"
+    finally:
+        # Don't wait on the slower engines once we have an answer
+        executor.shutdown(wait=False, cancel_futures=True)